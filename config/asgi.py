@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Lets settings pick ASGI-friendly defaults (no persistent DB connections)
+os.environ.setdefault('DJANGO_SERVER', 'asgi')
 
 application = get_asgi_application()
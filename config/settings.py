@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',  # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,7 +68,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedTemplates',  # DjangoTemplates plus render timing
         'DIRS': [BASE_DIR/"templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -81,6 +82,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Set by config/asgi.py when served by an ASGI server (uvicorn, daphne, ...)
+RUNNING_ASGI = os.getenv('DJANGO_SERVER') == 'asgi'
 
 
 # Database
@@ -93,6 +98,31 @@ DATABASES = {
     }
 }
 
+# DJANGO_DB_PROFILE=production tunes SQLite for several concurrent users:
+# WAL so readers never wait for a writer, BEGIN IMMEDIATE so writers queue
+# on the busy timeout instead of failing mid-transaction (see core.db), and
+# persistent connections so the pragmas are not re-run on every request.
+# Under ASGI each request gets its own connection object, so persistent
+# connections are off there unless DJANGO_CONN_MAX_AGE says otherwise.
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',    # durable at checkpoints; safe with WAL
+    'PRAGMA cache_size=-65536',     # 64 MiB page cache per connection
+    'PRAGMA mmap_size=268435456',   # read the first 256 MiB through mmap
+    'PRAGMA temp_store=MEMORY',
+]
+
+if os.getenv('DJANGO_DB_PROFILE', 'development') == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.getenv('DJANGO_CONN_MAX_AGE', '0' if RUNNING_ASGI else '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': '; '.join(SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': int(os.getenv('DJANGO_DB_BUSY_TIMEOUT', '20')),  # seconds to wait for the write lock
+        },
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -144,3 +174,53 @@ REST_FRAMEWORK = {
 
 # Allow large bulk form submissions
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 100000
+
+# Queue bulk uploads for the background worker (`python manage.py run_import_worker`)
+# instead of importing them inside the request
+BULK_UPLOAD_IN_BACKGROUND = True
+
+# Uploaded files (queued imports and their error workbooks)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Shared cache. Processes use it to tell each other when recipes change, so it
+# must be visible to every worker (file-based works for a single host).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', str(BASE_DIR / '.cache')),
+    }
+}
+
+# Recipes kept in each process's in-memory LRU (see recipes.recipe_cache)
+RECIPE_CACHE_SIZE = 4096
+
+# Layout rules used to compute ups from recipe dimensions (see recipes.imposition).
+# Lengths are in mm; purchase sheets are entered in PURCHASE_SHEET_UNIT_MM units.
+IMPOSITION = {
+    'BLEED_MM': 0,             # added on every side of each 1-up
+    'GUTTER_MM': 0,            # gap between neighbouring 1-ups
+    'MARGIN_MM': 0,            # unprintable edge (gripper) on every side of the print sheet
+    'ALLOW_ROTATION': True,    # try the 1-up turned 90° as well
+    'CUT_MARGIN_MM': 0,        # trim lost on every side when cutting a purchase sheet
+    'PURCHASE_SHEET_UNIT_MM': 25.4,  # purchase sheets are entered in inches
+}
+
+# Per-request instrumentation (see core.middleware and core.metrics)
+METRICS = {
+    'ENABLED': os.getenv('DJANGO_METRICS', '1') == '1',
+    'N_PLUS_ONE_THRESHOLD': 10,                  # same-shape queries in one request before it is flagged
+    'ALLOWED_IPS': os.getenv('DJANGO_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(','),  # who may read /metrics
+    'SERVER_TIMING': DEBUG,                      # add a Server-Timing header to every response
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.metrics': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
@@ -1,11 +1,22 @@
 from django.contrib import admin
 from django.urls import path, include
-from recipes import views as recipe_views
+from rest_framework.routers import DefaultRouter
+from core import views as core_views
+from jobs import views as job_views
+from jobs.api import JobViewSet
+from recipes.api import SKURecipeViewSet
+
+# Read-only JSON API for integrations (see core.api)
+api = DefaultRouter()
+api.register("skus", SKURecipeViewSet, basename="api-sku")
+api.register("jobs", JobViewSet, basename="api-job")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("", recipe_views.home, name="home"),   # ✅ Clean home page with tabs
+    path("", job_views.home, name="home"),   # ✅ Clean home page with tabs and dashboard
     path("recipes/", include("recipes.urls")), # ✅ Recipes app URLs
     path('jobs/', include('jobs.urls')),  # include job app URLs
+    path("api/", include(api.urls)),
+    path("metrics", core_views.metrics, name="metrics"),  # Prometheus scrape endpoint (local only)
 ]
 
@@ -1,3 +1,13 @@
 from django.contrib import admin
+from .models import Sequence, Statistic
 
-# Register your models here.
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_value")
+
+
+@admin.register(Statistic)
+class StatisticAdmin(admin.ModelAdmin):
+    list_display = ("key", "value")
+    search_fields = ("key",)
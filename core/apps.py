@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_wrapper
+
+        if settings.METRICS["ENABLED"]:
+            connection_created.connect(install_query_wrapper, dispatch_uid="core.metrics.install_query_wrapper")
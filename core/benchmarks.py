@@ -0,0 +1,229 @@
+"""
+Micro-benchmarks for the hot views.
+
+Each case issues one request through the test client against a throwaway
+database seeded with core.seed. It records the median wall time over a few
+repeats and the number of SQL queries. Results can be saved as a JSON
+baseline, and ``compare`` flags a case whose time grows by more than the
+threshold or whose query count grows at all.
+
+``measure_startup`` times what every new worker pays before its first
+request: a fresh interpreter loading the WSGI application and the URLconf.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from recipes.models import SKURecipe
+
+from .reports import XLSX
+from .seed import seed
+
+
+def _upload_csv(run):
+    lines = ["sku_name,material_type,application_type,one_up_width,one_up_height,"
+             "print_sheet_width,print_sheet_height,ups,purchase_sheet_width,purchase_sheet_height,purchase_ups"]
+    lines += [f"Bench Upload {run}-{i},Art Paper,UV,50,70,500,700,,23,35," for i in range(UPLOAD_ROWS)]
+    return "\n".join(lines).encode()
+
+
+UPLOAD_ROWS = 200
+
+
+def _bulk_upload(client, state):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    state["uploads"] = state.get("uploads", 0) + 1
+    upload = SimpleUploadedFile("bench.csv", _upload_csv(f"{state['size']}-{state['uploads']}"), "text/csv")
+    with override_settings(BULK_UPLOAD_IN_BACKGROUND=False):
+        return client.post("/recipes/bulk-upload/", {"file": upload, "report_format": XLSX})
+
+
+def _check_bulk_upload(response, state):
+    # A rejected form also answers quickly, so make sure the rows went in
+    prefix = f"Bench Upload {state['size']}-{state['uploads']}-"
+    created = SKURecipe.objects.filter(sku_name__startswith=prefix).count()
+    if response.status_code != 302 or created != UPLOAD_ROWS:
+        raise RuntimeError(f"bulk_upload imported {created} of {UPLOAD_ROWS} rows (status {response.status_code})")
+
+
+def _get(path):
+    def case(client, state):
+        return client.get(path.format(**state))
+    return case
+
+
+def _stream(path):
+    def case(client, state):
+        response = client.get(path.format(**state))
+        for _ in response.streaming_content:
+            pass
+        return response
+    return case
+
+
+# name -> callable(client, state) returning the response
+CASES = {
+    "bulk_upload": _bulk_upload,
+    "sku_list": _get("/recipes/"),
+    "sku_search": _get("/recipes/?q=matt+tag"),
+    "job_list": _get("/jobs/jobs/"),
+    "home": _get("/"),
+    "fetch_recipe": _get("/jobs/fetch-recipe/?sku={sku_name}"),
+    "get_last_job_code": _get("/jobs/get_last_job_code/"),
+    "sku_export": _stream("/recipes/export/"),
+    "job_export": _stream("/jobs/jobs/export/"),
+}
+
+# name -> callable(response, state) raising RuntimeError when the case did not
+# do its work; run outside the timed and counted part
+CHECKS = {
+    "bulk_upload": _check_bulk_upload,
+}
+
+DEFAULT_SIZES = [(1000, 5000), (10000, 50000)]
+
+
+def parse_sizes(value):
+    """'1000:5000,10000:50000' -> [(1000, 5000), (10000, 50000)] as (skus, jobs)."""
+    sizes = []
+    for part in value.split(","):
+        skus, _, jobs = part.partition(":")
+        sizes.append((int(skus), int(jobs or 0)))
+    return sizes
+
+
+def size_label(skus, jobs):
+    return f"{skus}skus/{jobs}jobs"
+
+
+def run(sizes=DEFAULT_SIZES, repeat=5, cases=None, seed_value=0, out=None):
+    """
+    Grow the current database to each size in turn and time every case.
+    Returns ``{"<case>@<size>": {"ms": median, "queries": n}}``.
+    Runs with a local memory cache so benchmarks never touch the shared one.
+    """
+    names = cases or list(CASES)
+    results = {}
+    client = Client()
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        have_skus = have_jobs = 0
+        for skus, jobs in sorted(sizes):
+            seed(skus=max(skus - have_skus, 0), jobs=max(jobs - have_jobs, 0), seed=seed_value)
+            have_skus, have_jobs = max(skus, have_skus), max(jobs, have_jobs)
+            label = size_label(skus, jobs)
+            state = {"size": label, "sku_name": SKURecipe.objects.values_list("sku_name", flat=True).first()}
+            for name in names:
+                timings, queries = [], 0
+                for _ in range(repeat):
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        response = CASES[name](client, state)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{name} returned {response.status_code}")
+                    if name in CHECKS:
+                        CHECKS[name](response, state)
+                    queries = max(queries, len(captured))
+                results[f"{name}@{label}"] = {"ms": round(statistics.median(timings), 2), "queries": queries}
+                if out:
+                    out(f"{name:<20} {label:<22} {results[f'{name}@{label}']['ms']:>9.2f} ms {queries:>4} queries")
+    return results
+
+
+def compare(results, baseline, threshold=0.25, min_ms=5.0):
+    """
+    Regressions of ``results`` against ``baseline``, as messages. A case
+    regresses when it is more than ``threshold`` (a fraction) slower, ignoring
+    differences under ``min_ms`` of noise, or when it runs more queries.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        limit = max(base["ms"] * (1 + threshold), base["ms"] + min_ms)
+        if result["ms"] > limit:
+            regressions.append(f"{key}: {result['ms']:.2f} ms vs baseline {base['ms']:.2f} ms")
+        if result["queries"] > base["queries"]:
+            regressions.append(f"{key}: {result['queries']} queries vs baseline {base['queries']}")
+    return regressions
+
+
+def load_baseline(path):
+    return json.loads(Path(path).read_text())
+
+
+def save_baseline(path, results):
+    Path(path).write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+# Libraries that should only be loaded by the views and commands that use them
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl"]
+
+_STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns  # otherwise loaded by the first request
+import_ms = (time.perf_counter() - started) * 1000
+try:
+    import resource
+    rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kib //= 1024  # reported in bytes there
+except ImportError:  # Windows
+    rss_kib = None
+print(json.dumps({"import_ms": import_ms, "rss_kib": rss_kib,
+                  "loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+
+def measure_startup(runs=5):
+    """
+    Start ``runs`` fresh interpreters that load the app the way a worker does.
+    Returns the medians of the whole process's wall time (``process_ms``) and
+    of the Django part (``import_ms``), the peak RSS in MiB after startup
+    (``rss_mib``, None where the OS does not report it) and which
+    HEAVY_MODULES got loaded.
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings")}
+    probe = _STARTUP_PROBE % HEAVY_MODULES
+    process_ms, samples = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        process_ms.append((time.perf_counter() - started) * 1000)
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    rss = [sample["rss_kib"] for sample in samples if sample["rss_kib"] is not None]
+    return {
+        "process_ms": round(statistics.median(process_ms), 1),
+        "import_ms": round(statistics.median(sample["import_ms"] for sample in samples), 1),
+        "rss_mib": round(statistics.median(rss) / 1024, 1) if rss else None,
+        "loaded": samples[-1]["loaded"],
+    }
+
+
+def compare_startup(result, baseline, threshold=0.25):
+    """Regressions of a measure_startup ``result`` against ``baseline``, as messages."""
+    regressions = []
+    for key, unit in (("process_ms", "ms"), ("rss_mib", "MiB")):
+        if result.get(key) is not None and baseline.get(key) and result[key] > baseline[key] * (1 + threshold):
+            regressions.append(f"startup {key}: {result[key]} {unit} vs baseline {baseline[key]} {unit}")
+    newly_loaded = sorted(set(result["loaded"]) - set(baseline.get("loaded", [])))
+    if newly_loaded:
+        regressions.append(f"startup now imports {', '.join(newly_loaded)}")
+    return regressions
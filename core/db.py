@@ -0,0 +1,178 @@
+"""
+Write helpers for running on SQLite with several writers.
+
+SQLite allows one writer at a time. With the production profile (see
+``DJANGO_DB_PROFILE`` in config/settings.py) every transaction starts with
+``BEGIN IMMEDIATE``, so a writer waits for the lock (up to the busy timeout)
+before it does anything. ``write_transaction`` retries that BEGIN with
+backoff when the timeout runs out. The function only runs once the lock is
+held, so a retry never repeats work.
+
+``WriteCoalescer`` lets bulk paths hand over rows one by one or in large
+lists and writes them in short transactions of at most ``max_rows`` rows.
+Each batch is prepared (``prepare_insert`` turns model instances into
+database values) before the lock is taken, so the transaction itself is a
+single ``executemany``. The write lock is released between batches and
+interactive saves get in between, instead of waiting for a whole import.
+"""
+import functools
+import random
+import time
+
+from django.db import OperationalError, connections, transaction
+from django.db.models import AutoField
+
+
+# Attempts at acquiring the write lock, and the first backoff delay (seconds)
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY = 0.05
+
+# Defaults for WriteCoalescer
+COALESCE_MAX_ROWS = 500
+COALESCE_MAX_SECONDS = 0.25
+
+
+def is_locked(error):
+    """True for SQLite's "database is locked" / "database table is locked" errors."""
+    return isinstance(error, OperationalError) and "locked" in str(error)
+
+
+def write_transaction(func, *args, using="default", **kwargs):
+    """
+    Call ``func(*args, **kwargs)`` inside ``transaction.atomic()``, retrying
+    the start of the transaction while the database is locked. Nested calls
+    (already inside a transaction) just use a savepoint.
+    """
+    if connections[using].in_atomic_block:
+        with transaction.atomic(using=using):
+            return func(*args, **kwargs)
+
+    delay = LOCK_RETRY_DELAY
+    for _ in range(LOCK_RETRIES - 1):
+        with _LockAttempt(using) as started:
+            if started:
+                return func(*args, **kwargs)
+        time.sleep(delay * (1 + random.random()))  # jittered, so waiting writers do not retry in step
+        delay *= 2
+
+    # Last attempt: a lock error now propagates
+    with transaction.atomic(using=using):
+        return func(*args, **kwargs)
+
+
+class _LockAttempt:
+    """
+    Enter an atomic block, swallowing a lock error raised while beginning it.
+    ``__enter__`` returns False when the lock could not be taken.
+    """
+
+    def __init__(self, using):
+        self.atomic = transaction.atomic(using=using)
+        self.entered = False
+
+    def __enter__(self):
+        try:
+            self.atomic.__enter__()
+        except OperationalError as e:
+            if not is_locked(e):
+                raise
+            return False
+        self.entered = True
+        return True
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.entered:
+            return self.atomic.__exit__(exc_type, exc_value, traceback)
+        return False
+
+
+def atomic_write(func):
+    """Decorator form of write_transaction."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return write_transaction(func, *args, **kwargs)
+    return wrapper
+
+
+def prepare_insert(model, objs, using="default"):
+    """
+    Build the INSERT for new ``objs`` outside any transaction: returns
+    ``(sql, rows)`` for ``execute_insert``. Like bulk_create it sends no
+    signals; unlike it the new primary keys are not read back.
+    """
+    connection = connections[using]
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.generated and not isinstance(field, AutoField)
+    ]
+    rows = []
+    for obj in objs:
+        obj._prepare_related_fields_for_save(operation_name="bulk_create")
+        rows.append([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
+
+    quote = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(model._meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    return sql, rows
+
+
+def execute_insert(prepared, using="default"):
+    """Run a ``prepare_insert`` result as one executemany."""
+    sql, rows = prepared
+    with connections[using].cursor() as cursor:
+        cursor.executemany(sql, rows)
+    return len(rows)
+
+
+class WriteCoalescer:
+    """
+    Buffer items and pass them to ``write`` in short transactions.
+
+    A batch is written once ``max_rows`` items are waiting, or when an item
+    arrives ``max_seconds`` after the first one in the buffer. ``prepare``
+    (optional) runs first, outside the transaction, and its result is what
+    ``write`` receives; keep the expensive Python work there. ``write``
+    should do all the database work for its batch (insert, counters, cache
+    bumps) so each batch commits as a whole, and return how many rows it
+    wrote. Use it as a context manager to flush the rest on exit.
+    """
+
+    def __init__(self, write, prepare=None, max_rows=COALESCE_MAX_ROWS, max_seconds=COALESCE_MAX_SECONDS,
+                 using="default"):
+        self.write = write
+        self.prepare = prepare
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.using = using
+        self.pending = []
+        self.first_added = None
+        self.written = 0
+
+    def add(self, item):
+        if not self.pending:
+            self.first_added = time.monotonic()
+        self.pending.append(item)
+        if len(self.pending) >= self.max_rows or time.monotonic() - self.first_added >= self.max_seconds:
+            self.flush()
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+    def flush(self):
+        if not self.pending:
+            return
+        items, self.pending = self.pending, []
+        batch = self.prepare(items) if self.prepare else items
+        self.written += write_transaction(self.write, batch, using=self.using) or 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
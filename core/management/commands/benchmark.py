@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot views at several data sizes on a throwaway test database "
+        "and compare them with a saved baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="1000:5000,10000:50000",
+            help="Comma-separated SKUS:JOBS data sizes (default 1000:5000,10000:50000).",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the median is kept (default 5).")
+        parser.add_argument("--case", action="append", choices=sorted(benchmarks.CASES), help="Only run this case (repeatable).")
+        parser.add_argument("--baseline", help="JSON baseline file to compare with (or write, with --save-baseline).")
+        parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.25,
+            help="Allowed slowdown as a fraction of the baseline time (default 0.25).",
+        )
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline PATH.")
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = benchmarks.run(
+                sizes=benchmarks.parse_sizes(options["sizes"]),
+                repeat=options["repeat"],
+                cases=options["case"],
+                out=self.stdout.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if not options["baseline"]:
+            return
+        if options["save_baseline"]:
+            benchmarks.save_baseline(options["baseline"], results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            return
+
+        regressions = benchmarks.compare(results, benchmarks.load_baseline(options["baseline"]), options["threshold"])
+        if regressions:
+            for line in regressions:
+                self.stderr.write(line)
+            raise CommandError(f"{len(regressions)} benchmark regressions.")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.seed import seed
+
+
+class Command(BaseCommand):
+    help = "Add synthetic SKUs and jobs (for benchmarks and local testing)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--skus", type=int, default=1000, help="SKUs to add (default 1000).")
+        parser.add_argument("--jobs", type=int, default=5000, help="Jobs to add (default 5000).")
+        parser.add_argument("--seed", type=int, help="Random seed, for repeatable data.")
+
+    def handle(self, *args, **options):
+        created = seed(skus=options["skus"], jobs=options["jobs"], seed=options["seed"])
+        self.stdout.write(self.style.SUCCESS(f"Added {created['skus']} SKUs and {created['jobs']} jobs."))
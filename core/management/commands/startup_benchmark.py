@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure worker cold start: wall time and memory of a fresh process "
+        "loading the app, and which heavy libraries it imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Processes to start; medians are kept (default 5).")
+        parser.add_argument("--baseline", help="JSON baseline file to compare with (or write, with --save-baseline).")
+        parser.add_argument("--save-baseline", action="store_true", help="Write the result to --baseline.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.25,
+            help="Allowed growth as a fraction of the baseline (default 0.25).",
+        )
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline PATH.")
+
+        result = benchmarks.measure_startup(runs=options["runs"])
+        rss = f"{result['rss_mib']} MiB" if result["rss_mib"] is not None else "n/a"
+        self.stdout.write(f"cold start   {result['process_ms']:>8.1f} ms (Django setup + URLconf {result['import_ms']:.1f} ms)")
+        self.stdout.write(f"peak RSS     {rss:>11}")
+        self.stdout.write(f"heavy libs   {', '.join(result['loaded']) or 'none'}")
+
+        if not options["baseline"]:
+            return
+        if options["save_baseline"]:
+            benchmarks.save_baseline(options["baseline"], result)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            return
+
+        regressions = benchmarks.compare_startup(result, benchmarks.load_baseline(options["baseline"]), options["threshold"])
+        if regressions:
+            for line in regressions:
+                self.stderr.write(line)
+            raise CommandError(f"{len(regressions)} startup regressions.")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,254 @@
+"""
+In-process request metrics in the Prometheus text format.
+
+core.middleware.RequestMetricsMiddleware records, for every request, the
+wall time, the number and total time of SQL queries and the template render
+time, labelled by view. The samples land in histograms kept in this
+process's memory and are served by the ``metrics`` view.
+
+Each worker process keeps its own registry, so scrape every worker (or run
+a single process per port). Nothing is persisted across restarts, which
+Prometheus handles as a counter reset.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+
+
+# Upper bounds (seconds) for the time histograms
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds for the queries-per-request histogram
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+# Reads with at least this many placeholders are treated as batched (chunked
+# IN lists) rather than as one-row-at-a-time queries.
+BATCHED_PARAMS = 100
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\((?:\s*%s\s*,)*\s*%s\s*\)")
+# Only reads can be N+1 lookups; batched writes (core.db.WriteCoalescer) and
+# transaction control legitimately repeat once per batch.
+_READS = ("SELECT", "WITH")
+
+
+# ------------------------
+# Registry
+# ------------------------
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self):
+        for label_values, series in sorted(self.series.items()):
+            labels = list(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield "_bucket", labels + [("le", _format_number(bound))], cumulative
+            yield "_bucket", labels + [("le", "+Inf")], series[-1]
+            yield "_sum", labels, series[-2]
+            yield "_count", labels, series[-1]
+
+
+class CounterMetric:
+    type = "counter"
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.series = Counter()
+
+    def inc(self, *label_values, amount=1):
+        self.series[label_values] += amount
+
+    def samples(self):
+        for label_values, value in sorted(self.series.items()):
+            yield "", list(zip(self.labels, label_values)), value
+
+
+_lock = threading.Lock()
+
+REQUEST_SECONDS = Histogram(
+    "erp_request_duration_seconds", "Wall time from the first middleware to the response.",
+    ("view", "method"), TIME_BUCKETS,
+)
+SQL_SECONDS = Histogram(
+    "erp_request_sql_seconds", "Time spent executing SQL per request.", ("view",), TIME_BUCKETS,
+)
+TEMPLATE_SECONDS = Histogram(
+    "erp_request_template_seconds", "Time spent rendering templates per request.", ("view",), TIME_BUCKETS,
+)
+QUERIES = Histogram(
+    "erp_request_queries", "SQL queries executed per request.", ("view",), QUERY_BUCKETS,
+)
+REQUESTS = CounterMetric(
+    "erp_requests_total", "Requests handled.", ("view", "method", "status"),
+)
+N_PLUS_ONE = CounterMetric(
+    "erp_n_plus_one_suspects_total",
+    "Requests that ran the same SELECT shape at least METRICS['N_PLUS_ONE_THRESHOLD'] times.",
+    ("view",),
+)
+
+REGISTRY = [REQUEST_SECONDS, SQL_SECONDS, TEMPLATE_SECONDS, QUERIES, REQUESTS, N_PLUS_ONE]
+
+
+def reset():
+    with _lock:
+        for metric in REGISTRY:
+            metric.series.clear()
+
+
+# ------------------------
+# Per-request collection
+# ------------------------
+class RequestMetrics:
+    """What one request spent; filled in by the middleware, record_query and TimedTemplates."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = Counter()  # SQL text -> times executed
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def suspects(self, threshold):
+        """[(count, shape)] of read shapes repeated ``threshold`` or more times, most repeated first."""
+        if self.query_count < threshold:
+            return []
+        shapes = Counter()
+        for sql, count in self.queries.items():
+            if not sql.lstrip().upper().startswith(_READS) or sql.count("%s") >= BATCHED_PARAMS:
+                continue
+            shapes[query_shape(sql)] += count
+        return [(count, shape) for shape, count in shapes.most_common() if count >= threshold]
+
+    def observe(self, view, method, status, wall_time):
+        with _lock:
+            REQUEST_SECONDS.observe(wall_time, view, method)
+            SQL_SECONDS.observe(self.sql_time, view)
+            TEMPLATE_SECONDS.observe(self.template_time, view)
+            QUERIES.observe(self.query_count, view)
+            REQUESTS.inc(view, method, str(status))
+
+
+current_request = ContextVar("current_request_metrics", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection (see install_query_wrapper):
+    times the statement into the current request's RequestMetrics, if any.
+    The context variable follows async views into sync_to_async threads, so
+    queries run there are counted against the right request too.
+    """
+    metrics = current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - start
+        metrics.queries[sql] += 1
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created receiver. Goes first in the list, so temporary wrappers can still pop themselves."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def query_shape(sql):
+    """``sql`` with literals and IN lists collapsed, so per-row variants of one query compare equal."""
+    return _IN_LISTS.sub("(...)", _LITERALS.sub("?", sql))
+
+
+# ------------------------
+# Template timing
+# ------------------------
+class TimedTemplates(DjangoTemplates):
+    """The Django template backend, timing each top-level render into the current RequestMetrics."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = current_request.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+# ------------------------
+# Exposition
+# ------------------------
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render():
+    """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    with _lock:
+        for metric in REGISTRY:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                label_text = ",".join(f'{name}="{_escape(v)}"' for name, v in labels)
+                name = metric.name + suffix
+                lines.append(f"{name}{{{label_text}}} {_format_number(value)}" if labels else f"{name} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def allowed(request):
+    """Only the addresses in METRICS['ALLOWED_IPS'] may read the metrics."""
+    return request.META.get("REMOTE_ADDR") in settings.METRICS["ALLOWED_IPS"]
@@ -0,0 +1,101 @@
+"""
+Per-request SQL, template and latency instrumentation (see core.metrics).
+
+Queries are timed by core.metrics.record_query, which core.apps installs on
+every database connection; the middleware only marks which request is
+current.
+
+The cost per query is one timer pair and a dict increment; grouping queries
+by shape to look for N+1 patterns only happens once per request, and only
+when the request ran at least N_PLUS_ONE_THRESHOLD queries.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+
+
+logger = logging.getLogger("core.metrics")
+
+
+def _view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.func.__qualname__
+
+
+@contextmanager
+def _measure(current):
+    """Route this request's queries and template renders into ``current``."""
+    token = metrics.current_request.set(current)
+    try:
+        yield
+    finally:
+        metrics.current_request.reset(token)
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every request and count its queries, labelled by view. Requests
+    running one SELECT shape N_PLUS_ONE_THRESHOLD times or more are logged
+    as suspected N+1. With METRICS['SERVER_TIMING'] the numbers are also
+    sent back in a Server-Timing header for the browser's network panel.
+    Works in both sync (WSGI) and async (ASGI) stacks.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = settings.METRICS
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = config["N_PLUS_ONE_THRESHOLD"]
+        self.server_timing = config["SERVER_TIMING"]
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        current = metrics.RequestMetrics()
+        with _measure(current):
+            response = self.get_response(request)
+        return self._finish(request, response, current)
+
+    async def __acall__(self, request):
+        current = metrics.RequestMetrics()
+        with _measure(current):
+            response = await self.get_response(request)
+        return self._finish(request, response, current)
+
+    def _finish(self, request, response, current):
+        # Streaming bodies are produced after this point and are not included
+        wall_time = time.perf_counter() - current.started
+        view = _view_label(request)
+        current.observe(view, request.method, response.status_code, wall_time)
+
+        suspects = current.suspects(self.threshold)
+        if suspects:
+            metrics.N_PLUS_ONE.inc(view)
+            count, shape = suspects[0]
+            logger.warning(
+                "Suspected N+1 in %s %s (%s): %d x %s",
+                request.method, request.path, view, count, shape[:300],
+            )
+
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={current.sql_time * 1000:.1f};desc="{current.query_count} queries", '
+                f"tpl;dur={current.template_time * 1000:.1f}, "
+                f"total;dur={wall_time * 1000:.1f}"
+            )
+        return response
@@ -1,3 +1,21 @@
 from django.db import models
 
-# Create your models here.
+
+class Sequence(models.Model):
+    """Named counter backing document numbers such as SKU codes (see core.sequences)."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
+class Statistic(models.Model):
+    """Named counter read by the dashboard, adjusted as the counted rows change (see core.stats)."""
+
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
@@ -0,0 +1,105 @@
+"""
+Keyset (cursor) pagination over ``(created_at, id)``, newest first.
+
+Each page is fetched with ``WHERE (created_at, id) < cursor ORDER BY ... LIMIT``
+against the (created_at, id) index, so page 500 costs the same as page 1.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+PAGE_SIZE = 50
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def pack_cursor(*parts):
+    """Encode cursor parts into an opaque URL-safe token."""
+    raw = "|".join(str(part) for part in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def unpack_cursor(value):
+    """Split a token made by pack_cursor back into its string parts, or None if malformed."""
+    if not value:
+        return None
+    try:
+        return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode().split("|")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def encode_cursor(direction, obj):
+    return pack_cursor(direction, obj.created_at.isoformat(), obj.pk)
+
+
+def decode_cursor(value):
+    """Return (direction, created_at, pk), or None for a missing or malformed cursor."""
+    parts = unpack_cursor(value)
+    if not parts or len(parts) != 3 or parts[0] not in (NEXT, PREVIOUS):
+        return None
+    try:
+        return parts[0], datetime.fromisoformat(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+def keyset_paginate(queryset, cursor=None, per_page=PAGE_SIZE):
+    """Return the KeysetPage of ``queryset`` that ``cursor`` points at (the first page if None)."""
+    position = decode_cursor(cursor)
+
+    if position is None:
+        rows = list(queryset.order_by("-created_at", "-id")[:per_page + 1])
+        items = rows[:per_page]
+        next_cursor = encode_cursor(NEXT, items[-1]) if len(rows) > per_page else None
+        return KeysetPage(items, next_cursor=next_cursor)
+
+    direction, created_at, pk = position
+    if direction == NEXT:
+        older = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        rows = list(queryset.filter(older).order_by("-created_at", "-id")[:per_page + 1])
+        items = rows[:per_page]
+        return KeysetPage(
+            items,
+            next_cursor=encode_cursor(NEXT, items[-1]) if len(rows) > per_page else None,
+            previous_cursor=encode_cursor(PREVIOUS, items[0]) if items else None,
+        )
+
+    # Walking back: fetch the newer rows closest to the cursor, then flip them
+    newer = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+    rows = list(queryset.filter(newer).order_by("created_at", "id")[:per_page + 1])
+    items = rows[:per_page][::-1]
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(NEXT, items[-1]) if items else None,
+        previous_cursor=encode_cursor(PREVIOUS, items[0]) if len(rows) > per_page else None,
+    )
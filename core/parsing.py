@@ -0,0 +1,58 @@
+"""
+Cell parsers shared by the SKU and job importers.
+
+Both importers read the same kinds of cells (blank markers, decimals, whole
+counts), so they parse them here and reject the same inputs with the same
+per-row messages. Every parser raises ValueError for a bad cell.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection
+
+
+class MissingColumnsError(ValueError):
+    """Raised when an upload lacks one of the importer's required columns."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        super().__init__(f"Missing required columns: {', '.join(columns)}")
+
+
+def is_blank(value):
+    """True for blank cells: None, NaN/NaT (as pandas reads them) or whitespace."""
+    return value is None or value != value or (isinstance(value, str) and not value.strip())
+
+
+def parse_decimal(value, field_name="value"):
+    """Parse a finite Decimal (a decimal comma is accepted); blanks give None."""
+    if is_blank(value):
+        return None
+    try:
+        number = Decimal(str(value).strip().replace(",", "."))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid {field_name}: '{value}' must be a decimal number")
+    if not number.is_finite():
+        raise ValueError(f"Invalid {field_name}: '{value}' must be a decimal number")
+    return number
+
+
+def parse_count(value, field_name, model=None):
+    """
+    Parse a whole, non-negative number; blanks give None. With ``model`` the
+    number must also fit its ``field_name`` integer column on this database.
+    """
+    if is_blank(value):
+        return None
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid {field_name}: '{value}' must be a whole number")
+    # Also rejects inf/NaN, which have no integral value
+    if not number.is_finite() or number != number.to_integral_value() or number < 0:
+        raise ValueError(f"Invalid {field_name}: '{value}' must be a whole number")
+    if model is not None:
+        internal_type = model._meta.get_field(field_name).get_internal_type()
+        _, high = connection.ops.integer_field_range(internal_type)
+        if high is not None and number > high:
+            raise ValueError(f"Invalid {field_name}: '{value}' must be at most {high}")
+    return int(number)
@@ -0,0 +1,106 @@
+"""
+Result reports for bulk imports.
+
+A report holds only the rows that failed: their row number in the uploaded
+file, the error, then the row's original columns. Rows are appended as each
+chunk of the import is checked, through openpyxl's write-only workbook or a
+CSV writer, into a temporary file. So building a report costs time and
+memory in proportion to the number of failures, not to the size of the
+upload. openpyxl is only imported when an Excel report is actually built.
+"""
+import csv
+import io
+import re
+import tempfile
+
+from django.http import FileResponse
+
+
+XLSX = "xlsx"
+CSV = "csv"
+
+FORMAT_CHOICES = [
+    (XLSX, "Excel (.xlsx)"),
+    (CSV, "CSV (smaller, opens anywhere)"),
+]
+
+CONTENT_TYPES = {
+    XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    CSV: "text/csv",
+}
+
+
+# "Row N: " prefix of the messages in an importer's DataFrame "Error" column
+_ROW_PREFIX = re.compile(r"^Row (\d+): ")
+
+
+def _cell(value):
+    # Blank cells come back from pandas as NaN/NaT (the only values unequal to
+    # themselves), which Excel cannot store
+    return None if value is None or value != value else value
+
+
+class ErrorReport:
+    """
+    Failing rows of one import, in ``format`` ("xlsx" or "csv").
+
+    ``add`` takes the header and ``(row number, error, cells)`` tuples, as
+    recipes.importer reports a chunk's failures; ``add_frame`` takes the
+    failing rows of a DataFrame with an "Error" column of "Row N: message"
+    strings (jobs.importer). ``close`` finishes the file and returns it
+    rewound.
+    """
+
+    def __init__(self, format=XLSX):
+        if format not in CONTENT_TYPES:
+            raise ValueError(f"Unknown report format: {format}")
+        self.format = format
+        self.rows = 0
+        self.columns = None
+        self.file = tempfile.TemporaryFile()
+        if format == CSV:
+            self._text = io.TextIOWrapper(self.file, encoding="utf-8", newline="", write_through=True)
+            self._append = csv.writer(self._text).writerow
+        else:
+            import openpyxl
+
+            self._workbook = openpyxl.Workbook(write_only=True)
+            self._append = self._workbook.create_sheet("Errors").append
+
+    def add(self, columns, rows):
+        if self.columns is None:
+            self.columns = list(columns)
+            self._append(["Row", "Error"] + self.columns)
+        for number, error, values in rows:
+            self._append([number, error] + [_cell(value) for value in values])
+            self.rows += 1
+
+    def add_frame(self, failed):
+        columns = [column for column in failed.columns if column != "Error"]
+        rows = []
+        for label, error, values in zip(failed.index, failed["Error"], failed[columns].itertuples(index=False, name=None)):
+            match = _ROW_PREFIX.match(error)
+            number = int(match.group(1)) if match else label + 2
+            rows.append((number, error[match.end():] if match else error, values))
+        self.add(columns, rows)
+
+    def close(self):
+        if self.format == CSV:
+            self._text.detach()
+        else:
+            self._workbook.save(self.file)
+        self.file.seek(0)
+        return self.file
+
+    def filename(self, name):
+        return f"{name}.{self.format}"
+
+    def response(self, name):
+        """Finish the report and send it as a download called ``name`` plus the extension."""
+        return FileResponse(
+            self.close(),
+            as_attachment=True,
+            filename=self.filename(name),
+            content_type=CONTENT_TYPES[self.format],
+        )
+
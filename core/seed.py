@@ -0,0 +1,118 @@
+"""
+Synthetic catalog and job data for benchmarks and local testing.
+
+SKUs get realistic 1-up sizes, common print sheet sizes in mm and purchase
+sheets as "WxH" inch strings, with ups calculated by recipes.imposition.
+Jobs are spread over the recipes, statuses and the next few months.
+Everything is written with bulk_create, and the dashboard counters and
+recipe cache are refreshed at the end.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.stats import rebuild
+from recipes.imposition import compute_purchase_ups, compute_ups
+from recipes.models import SKURecipe
+from recipes.recipe_cache import RECIPE_FIELDS, schedule_version_bump
+
+
+BATCH_SIZE = 500
+
+PRODUCTS = ["Clothing Tag", "Hang Tag", "Care Label", "Mono Carton", "Sleeve", "Sticker", "Insert Card", "Belly Band"]
+FINISHES = ["Matt", "Gloss", "Kraft", "Premium", "Eco", "Classic"]
+MATERIALS = ["Art Paper 300gsm", "Art Card 350gsm", "Kraft Board", "Duplex Board", "Bleach Card", "Sticker Paper"]
+APPLICATIONS = ["Lamination", "UV", "Foil", "Emboss", "Die Cut", "Plain"]
+ONE_UP_SIZES = [(40, 70), (50, 70), (50, 90), (60, 100), (85, 55), (100, 150), (120, 180), (210, 297)]
+PRINT_SHEETS = [(508, 711), (457, 584), (355, 508), (406, 558), (720, 1020)]
+PURCHASE_SHEETS = ["23x36", "25x36", "28x40", "20x30", "31x43"]
+CUSTOMERS = ["ABC Apparel", "Northwind Foods", "Blue Fashion", "Summit Retail", "Green Leaf Co", None]
+
+
+def seed_skus(count, seed=None):
+    """Create ``count`` SKUs with unique names; returns how many were created."""
+    if count <= 0:
+        return 0
+    rng = random.Random(seed)
+    start = SKURecipe.objects.count()
+    rows = []
+    for n in range(start, start + count):
+        width, height = rng.choice(ONE_UP_SIZES)
+        print_w, print_h = rng.choice(PRINT_SHEETS)
+        purchase = rng.choice(PURCHASE_SHEETS)
+        purchase_w, purchase_h = (Decimal(part) for part in purchase.split("x"))
+        rows.append({
+            "sku_name": f"{rng.choice(FINISHES)} {rng.choice(PRODUCTS)} {n + 1:06d}",
+            "material_type": rng.choice(MATERIALS),
+            "application_type": rng.choice(APPLICATIONS),
+            "one_up_width": Decimal(width), "one_up_height": Decimal(height),
+            "print_sheet_width": Decimal(print_w), "print_sheet_height": Decimal(print_h),
+            "print_sheet_size": f"{print_w}x{print_h}",
+            "purchase_sheet_width": purchase_w, "purchase_sheet_height": purchase_h,
+            "purchase_sheet_size": purchase,
+        })
+
+    ups = compute_ups(*([row[f] for row in rows] for f in (
+        "one_up_width", "one_up_height", "print_sheet_width", "print_sheet_height")))
+    purchase_ups = compute_purchase_ups(*([row[f] for row in rows] for f in (
+        "print_sheet_width", "print_sheet_height", "purchase_sheet_width", "purchase_sheet_height")))
+
+    with transaction.atomic():
+        codes = SKURecipe.allocate_codes(count)
+        SKURecipe.objects.bulk_create(
+            [
+                SKURecipe(sku_code=code, ups=max(int(u), 1), purchase_ups=max(int(p), 1), **row)
+                for row, code, u, p in zip(rows, codes, ups, purchase_ups)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        schedule_version_bump()
+    return count
+
+
+def seed_jobs(count, seed=None):
+    """Create ``count`` jobs over the existing SKUs; returns how many were created."""
+    if count <= 0:
+        return 0
+    recipes = list(SKURecipe.objects.values(*RECIPE_FIELDS))
+    if not recipes:
+        raise ValueError("Seed some SKUs before seeding jobs.")
+
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    statuses = ["pending"] * 5 + ["in_progress"] * 2 + ["completed"] * 3
+    jobs = []
+    for n in range(count):
+        recipe = rng.choice(recipes)
+        po_date = today - datetime.timedelta(days=rng.randint(0, 60))
+        job = Job(
+            sku=recipe["sku_name"],
+            po_number=f"PO-{rng.randint(10000, 99999)}",
+            po_quantity=rng.choice([500, 1000, 2000, 5000, 10000, 25000]),
+            po_date=po_date,
+            unit_cost=Decimal(rng.randint(5, 500)) / 10,
+            planned_date=po_date + datetime.timedelta(days=rng.randint(7, 90)),
+            customer_name=rng.choice(CUSTOMERS),
+            stock=rng.choice([0, 0, 0, 100, 500]),
+            wastage=rng.choice([0, 50, 100, 200]),
+            status=rng.choice(statuses),
+        )
+        job.apply_recipe(recipe)
+        jobs.append(job)
+
+    with transaction.atomic():
+        for job, job_name in zip(jobs, Job.allocate_job_names(count)):
+            job.job_name = job_name
+        Job.objects.bulk_create(jobs, batch_size=BATCH_SIZE)
+    return count
+
+
+def seed(skus=0, jobs=0, seed=None):
+    """Seed SKUs, then jobs, and rebuild the dashboard counters."""
+    created = {"skus": seed_skus(skus, seed), "jobs": seed_jobs(jobs, seed)}
+    rebuild()
+    return created
@@ -0,0 +1,60 @@
+"""
+Atomic number allocator backed by the core Sequence table.
+
+``reserve(name, count)`` bumps a counter by ``count`` in a single
+``UPDATE ... RETURNING`` statement and returns the first number of the block,
+so concurrent callers always get disjoint ranges without scanning the tables
+that use the numbers.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Sequence
+
+
+def reserve(name, count=1, seed=None):
+    """
+    Reserve ``count`` consecutive numbers from sequence ``name`` and return the
+    first one. ``seed`` is an optional callable giving the last number already
+    in use; it is only called the first time a sequence is touched.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    last_value = _increment(name, count)
+    if last_value is None:
+        # First use: create the counter (get_or_create copes with a race
+        # against another process doing the same), then retry.
+        Sequence.objects.get_or_create(name=name, defaults={"last_value": seed() if seed else 0})
+        last_value = _increment(name, count)
+    return last_value - count + 1
+
+
+def current(name):
+    """Return the last number handed out by ``name``, or None if it was never used."""
+    return Sequence.objects.filter(name=name).values_list("last_value", flat=True).first()
+
+
+async def acurrent(name):
+    """Async current."""
+    return await Sequence.objects.filter(name=name).values_list("last_value", flat=True).afirst()
+
+
+def _increment(name, count):
+    table = connection.ops.quote_name(Sequence._meta.db_table)
+    if connection.features.can_return_columns_from_insert:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET last_value = last_value + %s WHERE name = %s RETURNING last_value",
+                [count, name],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    # Backends without UPDATE ... RETURNING: the row lock taken by the UPDATE
+    # keeps the follow-up read consistent inside the transaction.
+    with transaction.atomic():
+        if not Sequence.objects.filter(name=name).update(last_value=F("last_value") + count):
+            return None
+        return current(name)
+
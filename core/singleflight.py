@@ -0,0 +1,27 @@
+"""
+Collapse concurrent identical loads in async code.
+
+When hundreds of requests miss the same cache entry at once (a cold start,
+or right after a catalog change bumps the recipe cache version), ``shared``
+runs the load once and hands every waiter the same result, instead of
+queueing one identical query per request on the database thread.
+"""
+import asyncio
+
+
+_inflight = {}  # (event loop, key) -> task
+
+
+async def shared(key, load):
+    """
+    Await ``load()``; callers passing an equal ``key`` while it is running
+    get its result (or exception) instead of starting their own.
+    """
+    slot = (asyncio.get_running_loop(), key)
+    task = _inflight.get(slot)
+    if task is None:
+        task = asyncio.ensure_future(load())
+        _inflight[slot] = task
+        task.add_done_callback(lambda _: _inflight.pop(slot, None))
+    # A cancelled waiter must not cancel the load the others are waiting on
+    return await asyncio.shield(task)
@@ -0,0 +1,36 @@
+"""
+Incrementally maintained counters backed by the core Statistic table.
+
+Code that creates, changes or deletes counted rows calls ``adjust`` inside the
+same transaction, so a rollback undoes the counter change too. ``replace``
+recomputes a whole family of keys from scratch (see the rebuild_stats command).
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .models import Statistic
+
+
+def adjust(deltas):
+    """Add each ``{key: delta}`` to its counter, creating counters on first use."""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        if not Statistic.objects.filter(key=key).update(value=F("value") + delta):
+            # get_or_create copes with another process creating it first
+            Statistic.objects.get_or_create(key=key)
+            Statistic.objects.filter(key=key).update(value=F("value") + delta)
+
+
+def get_many(keys):
+    """Return ``{key: value}`` for ``keys``; counters that do not exist yet read as 0."""
+    values = dict(Statistic.objects.filter(key__in=keys).values_list("key", "value"))
+    return {key: values.get(key, 0) for key in keys}
+
+
+def replace(prefixes, values):
+    """Drop every counter whose key starts with one of ``prefixes`` and store ``values`` instead."""
+    with transaction.atomic():
+        for prefix in prefixes:
+            Statistic.objects.filter(key__startswith=prefix).delete()
+        Statistic.objects.bulk_create(Statistic(key=key, value=value) for key, value in values.items())
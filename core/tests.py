@@ -1,3 +1,268 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+import pandas as pd
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Job
+from recipes.models import SKURecipe
+
+from . import benchmarks, db, metrics, singleflight
+from .reports import ErrorReport
+from .models import Statistic
+from .pagination import decode_cursor, pack_cursor, unpack_cursor
+from .seed import seed
+from .sequences import current, reserve
+from .stats import adjust, get_many, replace
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class SequenceTests(TestCase):
+    def test_reserve_hands_out_consecutive_blocks(self):
+        self.assertEqual(reserve("test", 3), 1)
+        self.assertEqual(reserve("test"), 4)
+        self.assertEqual(current("test"), 4)
+
+    def test_seed_is_only_used_on_first_use(self):
+        self.assertEqual(reserve("seeded", seed=lambda: 41), 42)
+        self.assertEqual(reserve("seeded", seed=lambda: 1000), 43)
+
+    def test_reserve_is_one_query_once_the_sequence_exists(self):
+        reserve("hot")
+        with self.assertNumQueries(1):
+            reserve("hot", 10)
+
+
+class PaginationCursorTests(TestCase):
+    def test_round_trip(self):
+        self.assertEqual(unpack_cursor(pack_cursor("n", "2025-01-01T00:00:00", 7)), ["n", "2025-01-01T00:00:00", "7"])
+
+    def test_malformed_cursor_is_ignored(self):
+        self.assertIsNone(unpack_cursor(""))
+        self.assertIsNone(decode_cursor("%%%"))
+        self.assertIsNone(decode_cursor(pack_cursor("x", "not-a-date", 1)))
+
+
+class StatsTests(TestCase):
+    def test_adjust_creates_and_increments(self):
+        adjust({"a": 2, "b": 0})
+        adjust({"a": -1})
+        self.assertEqual(get_many(["a", "b"]), {"a": 1, "b": 0})
+        self.assertFalse(Statistic.objects.filter(key="b").exists())
+
+    def test_replace_drops_the_whole_family(self):
+        adjust({"jobs:x": 5, "other": 1})
+        replace(["jobs:"], {"jobs:y": 3})
+        self.assertEqual(get_many(["jobs:x", "jobs:y", "other"]), {"jobs:x": 0, "jobs:y": 3, "other": 1})
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SeedTests(TestCase):
+    def test_seed_creates_rows_and_counters(self):
+        self.assertEqual(seed(skus=20, jobs=50, seed=1), {"skus": 20, "jobs": 50})
+        self.assertEqual(SKURecipe.objects.count(), 20)
+        self.assertEqual(Job.objects.exclude(recipe=None).count(), 50)
+        self.assertEqual(get_many(["jobs:total", "skus:total"]), {"jobs:total": 50, "skus:total": 20})
+        self.assertFalse(SKURecipe.objects.filter(ups__lt=1).exists())
+
+
+class BenchmarkCompareTests(TestCase):
+    baseline = {"home@1": {"ms": 10.0, "queries": 2}, "job_list@1": {"ms": 100.0, "queries": 1}}
+
+    def test_within_threshold_passes(self):
+        results = {"home@1": {"ms": 14.0, "queries": 2}, "job_list@1": {"ms": 120.0, "queries": 1}}
+        self.assertEqual(benchmarks.compare(results, self.baseline, threshold=0.25), [])
+
+    def test_slowdown_and_extra_queries_fail(self):
+        results = {"home@1": {"ms": 10.0, "queries": 3}, "job_list@1": {"ms": 150.0, "queries": 1}}
+        regressions = benchmarks.compare(results, self.baseline, threshold=0.25)
+        self.assertEqual(len(regressions), 2)
+
+    def test_parse_sizes(self):
+        self.assertEqual(benchmarks.parse_sizes("10:20,5"), [(10, 20), (5, 0)])
+
+
+class BenchmarkRunTests(TestCase):
+    def test_bulk_upload_imports_every_row(self):
+        results = benchmarks.run(sizes=[(5, 0)], repeat=2, cases=["bulk_upload"])
+        self.assertEqual(list(results), ["bulk_upload@5skus/0jobs"])
+        self.assertEqual(SKURecipe.objects.count(), 5 + 2 * benchmarks.UPLOAD_ROWS)
+
+    def test_a_rejected_upload_fails_the_case(self):
+        # A blank report format makes the upload form invalid
+        with mock.patch.object(benchmarks, "XLSX", ""), self.assertRaisesMessage(RuntimeError, "imported 0 of 200 rows (status 200)"):
+            benchmarks.run(sizes=[(5, 0)], repeat=1, cases=["bulk_upload"])
+
+
+class StartupTests(SimpleTestCase):
+    def test_worker_startup_skips_heavy_libraries(self):
+        result = benchmarks.measure_startup(runs=1)
+        self.assertEqual(result["loaded"], [])
+
+    def test_compare_startup(self):
+        baseline = {"process_ms": 500.0, "rss_mib": 60.0, "loaded": []}
+        self.assertEqual(benchmarks.compare_startup({"process_ms": 550.0, "rss_mib": 61.0, "loaded": []}, baseline), [])
+        regressions = benchmarks.compare_startup({"process_ms": 900.0, "rss_mib": 61.0, "loaded": ["pandas"]}, baseline)
+        self.assertEqual(len(regressions), 2)
+
+
+class QueryShapeTests(TestCase):
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            metrics.query_shape("SELECT * FROM t WHERE a = 'x' AND id IN (%s, %s, %s) LIMIT 21"),
+            metrics.query_shape("SELECT * FROM t WHERE a = 'y' AND id IN (%s) LIMIT 1"),
+        )
+
+    def test_repeated_shapes_are_suspects_but_batches_are_not(self):
+        current = metrics.RequestMetrics()
+        current.queries.update({f"SELECT * FROM t WHERE id = {i}": 1 for i in range(12)})
+        current.queries["INSERT INTO t VALUES (" + ", ".join(["%s"] * 200) + ")"] = 30
+        current.queries['SAVEPOINT "s1_x1"'] = 30
+        current.queries["UPDATE core_statistic SET value = value + %s WHERE key = %s"] = 30  # once per write batch
+        self.assertEqual(current.suspects(10), [(12, "SELECT * FROM t WHERE id = ?")])
+        self.assertEqual(current.suspects(20), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(reverse("sku-list"))
+        self.assertEqual(metrics.REQUESTS.series[("sku-list", "GET", "200")], 1)
+        counts = metrics.QUERIES.series[("sku-list",)]
+        self.assertEqual(counts[-1], 1)                          # one request observed
+        self.assertEqual(counts[metrics.QUERY_BUCKETS.index(1)], 1)  # that ran one query
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("sku-list"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        body = response.content.decode()
+        self.assertIn("# TYPE erp_request_duration_seconds histogram", body)
+        self.assertIn('erp_requests_total{view="sku-list",method="GET",status="200"} 1', body)
+        self.assertIn('erp_request_queries_bucket{view="sku-list",le="+Inf"} 1', body)
+
+    def test_metrics_endpoint_is_local_only(self):
+        self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="10.1.2.3").status_code, 404)
+
+    async def test_async_views_count_their_queries(self):
+        await self.async_client.get(reverse("fetch_recipes") + "?sku=Nope")
+        counts = metrics.QUERIES.series[("fetch_recipes",)]
+        self.assertEqual(counts[metrics.QUERY_BUCKETS.index(1)], 1)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_load(self):
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def main():
+            return await asyncio.gather(*(singleflight.shared("key", load) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ["value"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_reach_every_caller_and_are_not_kept(self):
+        async def fail():
+            raise ValueError("boom")
+
+        async def main():
+            results = await asyncio.gather(*(singleflight.shared("key", fail) for _ in range(3)), return_exceptions=True)
+            return results, await singleflight.shared("key", lambda: asyncio.sleep(0, "ok"))
+
+        results, retry = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(retry, "ok")
+
+
+class WriteTransactionTests(SimpleTestCase):
+    def fake_atomic(self, errors):
+        """transaction.atomic stand-in whose __enter__ raises each of ``errors`` in turn."""
+        attempts = []
+
+        class FakeAtomic:
+            def __enter__(self):
+                attempts.append(1)
+                if len(attempts) <= len(errors):
+                    raise errors[len(attempts) - 1]
+
+            def __exit__(self, *exc_info):
+                return False
+
+        return mock.patch("core.db.transaction.atomic", lambda using: FakeAtomic()), attempts
+
+    def test_retries_while_locked(self):
+        patch, attempts = self.fake_atomic([OperationalError("database is locked")] * 2)
+        with patch, mock.patch("core.db.time.sleep"):
+            self.assertEqual(db.write_transaction(lambda: "done"), "done")
+        self.assertEqual(len(attempts), 3)
+
+    def test_gives_up_after_the_last_attempt(self):
+        patch, attempts = self.fake_atomic([OperationalError("database is locked")] * db.LOCK_RETRIES)
+        with patch, mock.patch("core.db.time.sleep"), self.assertRaises(OperationalError):
+            db.write_transaction(lambda: "done")
+        self.assertEqual(len(attempts), db.LOCK_RETRIES)
+
+    def test_other_errors_are_not_retried(self):
+        patch, attempts = self.fake_atomic([OperationalError("no such table: x")])
+        with patch, self.assertRaises(OperationalError):
+            db.write_transaction(lambda: "done")
+        self.assertEqual(len(attempts), 1)
+
+
+class WriteCoalescerTests(TestCase):
+    def test_batches_by_row_count(self):
+        batches = []
+        with db.WriteCoalescer(lambda batch: batches.append(batch) or len(batch), max_rows=3) as writer:
+            writer.extend(range(7))
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(writer.written, 7)
+
+    def test_batches_by_age(self):
+        batches = []
+        with db.WriteCoalescer(batches.append, prepare=tuple, max_seconds=0) as writer:
+            writer.extend("ab")
+        self.assertEqual(batches, [("a",), ("b",)])
+
+    def test_prepared_insert_matches_save(self):
+        db.execute_insert(db.prepare_insert(Statistic, [Statistic(key="a", value=3), Statistic(key="b", value=4)]))
+        self.assertEqual(get_many(["a", "b"]), {"a": 3, "b": 4})
+
+
+class ErrorReportTests(SimpleTestCase):
+    def failed_rows(self):
+        return pd.DataFrame(
+            {"sku_name": ["A", "B"], "ups": [10, None], "Error": ["Row 5: bad ups", "Row 9: missing"]},
+            index=[3, 7],
+        )
+
+    def test_xlsx_rows_keep_their_number_and_error(self):
+        report = ErrorReport("xlsx")
+        report.add(["sku_name", "ups"], [(5, "bad ups", ("A", 10)), (9, "missing", ("B", None))])
+        sheet = openpyxl.load_workbook(report.close()).active
+        self.assertEqual(list(sheet.iter_rows(values_only=True)), [
+            ("Row", "Error", "sku_name", "ups"),
+            (5, "bad ups", "A", 10),
+            (9, "missing", "B", None),
+        ])
+
+    def test_csv_from_a_dataframe(self):
+        report = ErrorReport("csv")
+        report.add_frame(self.failed_rows())
+        report.add_frame(self.failed_rows().iloc[:1])
+        self.assertEqual(report.close().read().decode().splitlines(), [
+            "Row,Error,sku_name,ups", "5,bad ups,A,10.0", "9,missing,B,", "5,bad ups,A,10.0",
+        ])
+        self.assertEqual(report.rows, 3)
@@ -1,3 +1,13 @@
-from django.shortcuts import render
+from django.http import Http404, HttpResponse
 
-# Create your views here.
+from . import metrics as request_metrics
+
+
+# ------------------------
+# Prometheus Metrics
+# ------------------------
+def metrics(request):
+    """Request histograms for this process, in the Prometheus text format."""
+    if not request_metrics.allowed(request):
+        raise Http404
+    return HttpResponse(request_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,3 +1,21 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import JobStatusChange, Machine
+
+
+@admin.register(Machine)
+class MachineAdmin(admin.ModelAdmin):
+    list_display = ("name", "sheets_per_hour", "hours_per_day", "setup_minutes", "materials", "application_types", "is_active")
+    list_filter = ("is_active",)
+
+
+@admin.register(JobStatusChange)
+class JobStatusChangeAdmin(admin.ModelAdmin):
+    list_display = ("job", "from_status", "to_status", "changed_at", "changed_by")
+    list_filter = ("to_status",)
+    raw_id_fields = ("job",)
+
+    # History is append-only
+    def has_change_permission(self, request, obj=None):
+        return False
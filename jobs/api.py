@@ -0,0 +1,49 @@
+"""Read-only API for jobs (routed under /api/jobs/, see core.api)."""
+import django_filters
+from django.db.models import Q
+from rest_framework import serializers
+
+from core.api import ReadOnlyAPIViewSet, SparseFieldsMixin
+
+from .models import Job
+
+
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    created_by = serializers.CharField(source="created_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = Job
+        fields = [
+            "id", "job_name", "status",
+            "sku", "sku_code", "recipe",
+            "po_number", "po_quantity", "po_date", "unit_cost",
+            "stock", "wastage", "planned_date", "customer_name", "notes",
+            "material_type", "application_type",
+            "one_up_width", "one_up_height",
+            "print_sheet_width", "print_sheet_height", "print_sheet_size", "ups",
+            "purchase_sheet_width", "purchase_sheet_height", "purchase_sheet_size", "purchase_ups",
+            "created_by", "created_at", "updated_at",
+        ]
+
+
+class JobFilter(django_filters.FilterSet):
+    status = django_filters.MultipleChoiceFilter(choices=Job.STATUS_CHOICES, distinct=False)
+    planned_date = django_filters.DateFromToRangeFilter()  # ?planned_date_after=&planned_date_before=
+    customer = django_filters.CharFilter(field_name="customer_name", lookup_expr="icontains")
+    material = django_filters.CharFilter(field_name="material_type", lookup_expr="iexact")
+    sku = django_filters.CharFilter(method="filter_sku", label="SKU name or code")
+    updated_since = django_filters.IsoDateTimeFilter(field_name="updated_at", lookup_expr="gte")
+
+    class Meta:
+        model = Job
+        fields = ["status", "planned_date", "customer", "material", "sku", "recipe", "po_number", "updated_since"]
+
+    def filter_sku(self, queryset, name, value):
+        return queryset.filter(Q(sku=value) | Q(sku_code=value))
+
+
+class JobViewSet(ReadOnlyAPIViewSet):
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    filterset_class = JobFilter
+    related = ("created_by",)
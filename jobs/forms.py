@@ -1,7 +1,7 @@
 from django import forms
-from .models import Job
-from recipes.models import SKURecipe
-import datetime
+from core.reports import FORMAT_CHOICES, XLSX
+from .models import Job, RECIPE_SNAPSHOT_FIELDS
+from recipes.recipe_cache import get_recipe
 
 class JobForm(forms.ModelForm):
     class Meta:
@@ -12,24 +12,13 @@ class JobForm(forms.ModelForm):
             'stock', 'wastage'
         ]
         widgets = {
+            'sku': forms.TextInput(attrs={'class': 'form-control', 'list': 'sku-options', 'autocomplete': 'off'}),  # Typeahead on job create
             'po_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'planned_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'sku_code': forms.TextInput(attrs={'readonly': 'readonly', 'class': 'form-control'}),
             'job_name': forms.TextInput(attrs={'readonly': 'readonly', 'class': 'form-control'}),  # Read-only JC# field
         }
 
-    def save(self, commit=True, *args, **kwargs):
-        # Add the JC# from JavaScript before saving
-        if not self.instance.job_name:
-            # Ensure we generate the JC# before saving
-            currentMonth = datetime.datetime.now().month
-            currentYear = datetime.datetime.now().year
-            job_number = f"JC-{currentMonth}-{currentYear}-00X1"  # Default to 0001
-
-            self.instance.job_name = job_number  # Set the JC# here
-
-        return super().save(commit=commit, *args, **kwargs)
-
     # Adding read-only fields for SKURecipe attributes
     material_type = forms.CharField(required=False, widget=forms.TextInput(attrs={'readonly': 'readonly', 'class': 'form-control'}))
     application_type = forms.CharField(required=False, widget=forms.TextInput(attrs={'readonly': 'readonly', 'class': 'form-control'}))
@@ -56,23 +45,26 @@ class JobForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        # JC# is assigned by Job.save on insert; never take it from the browser
+        self.fields['job_name'].disabled = True
+
         if self.instance and self.instance.sku:
-            # Fetch the SKURecipe instance based on the sku
-            try:
-                sku_recipe = SKURecipe.objects.get(sku_name=self.instance.sku)
-                # Set the sku_code and related fields
-                self.fields['sku_code'].initial = sku_recipe.sku_code
-                self.fields['material_type'].initial = sku_recipe.material_type
-                self.fields['application_type'].initial = sku_recipe.application_type
-                self.fields['one_up_width'].initial = sku_recipe.one_up_width
-                self.fields['one_up_height'].initial = sku_recipe.one_up_height
-                self.fields['print_sheet_width'].initial = sku_recipe.print_sheet_width
-                self.fields['print_sheet_height'].initial = sku_recipe.print_sheet_height
-                self.fields['print_sheet_size'].initial = sku_recipe.print_sheet_size
-                self.fields['ups'].initial = sku_recipe.ups
-                self.fields['purchase_sheet_width'].initial = sku_recipe.purchase_sheet_width
-                self.fields['purchase_sheet_height'].initial = sku_recipe.purchase_sheet_height
-                self.fields['purchase_sheet_size'].initial = sku_recipe.purchase_sheet_size
-                self.fields['purchase_ups'].initial = sku_recipe.purchase_ups
-            except SKURecipe.DoesNotExist:
+            # Fetch the recipe for the sku (cached per process)
+            sku_recipe = get_recipe(self.instance.sku)
+            if sku_recipe is None:
                 raise ValueError("The specified SKU does not have an associated recipe.")
+            # Set the sku_code and related fields
+            for field in RECIPE_SNAPSHOT_FIELDS:
+                self.fields[field].initial = sku_recipe[field]
+
+
+class JobImportForm(forms.Form):
+    file = forms.FileField(
+        label="Upload CSV or Excel file of PO lines",
+        help_text="Columns: sku (name or code), po_number, po_quantity, po_date, unit_cost, planned_date; "
+                  "optional customer_name, notes, stock, wastage",
+    )
+    report_format = forms.ChoiceField(
+        choices=FORMAT_CHOICES, initial=XLSX, label="Error report format",
+        help_text="Rows that fail are sent back in this format, with their row number and error",
+    )
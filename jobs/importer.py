@@ -0,0 +1,196 @@
+"""
+Bulk job (PO line) import from CSV/Excel.
+
+All SKUs of a file are resolved with one IN query (by name or code), the
+recipe snapshot is copied from that lookup, JC# numbers are reserved as one
+block, and the jobs are written with bulk_create in short transactions (see
+core.db.WriteCoalescer) so planners can save jobs while a large file is
+imported. import_dataframe fills an
+"Error" column with the per-row report, like the SKU bulk upload.
+"""
+import datetime
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+from django.db.models import Q
+
+from core.db import WriteCoalescer, execute_insert, prepare_insert
+from core.parsing import MissingColumnsError, is_blank, parse_count, parse_decimal
+
+from recipes.models import SKURecipe
+from recipes.recipe_cache import RECIPE_FIELDS
+
+from .models import Job
+from .stats import count_jobs
+
+
+REQUIRED_COLUMNS = ["sku", "po_number", "po_quantity", "po_date", "unit_cost", "planned_date"]
+OPTIONAL_COLUMNS = ["customer_name", "notes", "stock", "wastage"]
+
+BULK_CREATE_BATCH_SIZE = 500
+SKU_LOOKUP_CHUNK_SIZE = 450  # names + codes per IN query, under SQLite's parameter limit
+
+
+def missing_columns(columns):
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+
+# ------------------------
+# Field parsers
+# ------------------------
+def _text(value):
+    return "" if is_blank(value) else str(value).strip()
+
+
+def _parse_date(value, field_name):
+    if is_blank(value):
+        raise ValueError(f"{field_name} is required")
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        raise ValueError(f"Invalid {field_name}: '{value}' must be a date (YYYY-MM-DD)")
+
+
+def _parse_quantity(value, field_name, required=True):
+    number = parse_count(value, field_name, Job)
+    if number is None:
+        if required:
+            raise ValueError(f"{field_name} is required")
+        return 0
+    return number
+
+
+def _parse_cost(value):
+    cost = parse_decimal(value, "unit_cost")
+    if cost is None:
+        raise ValueError("unit_cost is required")
+    try:
+        return cost.quantize(Decimal("0.1"))
+    except InvalidOperation:  # more digits than the decimal context holds
+        raise ValueError(f"Invalid unit_cost: '{value}' must be a number")
+
+
+# ------------------------
+# Recipe lookup
+# ------------------------
+def resolve_skus(values):
+    """
+    Map every SKU name or code in ``values`` to its recipe dict (see
+    recipes.recipe_cache.RECIPE_FIELDS) with one IN query per chunk.
+    """
+    values = list(dict.fromkeys(values))
+    recipes = {}
+    for start in range(0, len(values), SKU_LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + SKU_LOOKUP_CHUNK_SIZE]
+        for recipe in SKURecipe.objects.filter(Q(sku_name__in=chunk) | Q(sku_code__in=chunk)).values(*RECIPE_FIELDS):
+            recipes[recipe["sku_code"]] = recipe
+            recipes[recipe["sku_name"]] = recipe  # names win over a code that looks the same
+    return recipes
+
+
+# ------------------------
+# Import
+# ------------------------
+def import_dataframe(df, user=None):
+    """
+    Validate and insert every PO line of ``df`` as a job.
+
+    Adds an "Error" column holding the per-row report (empty for rows that
+    were created) and returns the number of jobs created.
+    """
+    df["Error"] = ""
+    if df.empty:
+        return 0
+
+    labels = list(df.index)
+    rows = df.to_dict("records")
+    recipes = resolve_skus(_text(row.get("sku")) for row in rows if not is_blank(row.get("sku")))
+
+    errors = [""] * len(rows)
+    jobs = []
+    for i, row in enumerate(rows):
+        row_errors = []
+        sku = _text(row.get("sku"))
+        recipe = recipes.get(sku)
+        if not sku:
+            row_errors.append("sku is required")
+        elif recipe is None:
+            row_errors.append(f"SKU '{sku}' does not exist")
+
+        values = {}
+        for field, parse in (
+            ("po_quantity", lambda v: _parse_quantity(v, "po_quantity")),
+            ("po_date", lambda v: _parse_date(v, "po_date")),
+            ("unit_cost", _parse_cost),
+            ("planned_date", lambda v: _parse_date(v, "planned_date")),
+            ("stock", lambda v: _parse_quantity(v, "stock", required=False)),
+            ("wastage", lambda v: _parse_quantity(v, "wastage", required=False)),
+        ):
+            try:
+                values[field] = parse(row.get(field))
+            except ValueError as e:
+                row_errors.append(str(e))
+
+        po_number = _text(row.get("po_number"))
+        if not po_number:
+            row_errors.append("po_number is required")
+
+        if row_errors:
+            errors[i] = ", ".join(row_errors)
+            continue
+
+        job = Job(
+            sku=recipe["sku_name"],
+            po_number=po_number,
+            customer_name=_text(row.get("customer_name")) or None,
+            notes=_text(row.get("notes")) or None,
+            created_by=user,
+            **values,
+        )
+        job.apply_recipe(recipe)
+        jobs.append(job)
+
+    created = _write_jobs(jobs)
+    df["Error"] = [f"Row {labels[i] + 2}: {e}" if e else "" for i, e in enumerate(errors)]
+    return created
+
+
+def _write_jobs(jobs):
+    """Number ``jobs`` from one block of JC#s and insert them a batch per transaction."""
+    if not jobs:
+        return 0
+    for job, job_name in zip(jobs, Job.allocate_job_names(len(jobs))):
+        job.job_name = job_name
+
+    def prepare(batch):
+        return prepare_insert(Job, batch), [(job.status, job.planned_date) for job in batch]
+
+    def write(prepared):
+        insert, states = prepared
+        execute_insert(insert)
+        # Raw inserts send no post_save signals
+        count_jobs(states)
+        return len(states)
+
+    with WriteCoalescer(write, prepare, max_rows=BULK_CREATE_BATCH_SIZE) as writer:
+        writer.extend(jobs)
+    return writer.written
+
+
+def read_upload(file):
+    """Read an uploaded CSV/XLS/XLSX file into a DataFrame."""
+    file_ext = file.name.split(".")[-1].lower()
+    if file_ext == "csv":
+        df = pd.read_csv(file, dtype={"po_number": str, "sku": str})
+    elif file_ext in ("xls", "xlsx"):
+        df = pd.read_excel(file, dtype={"po_number": str, "sku": str})
+    else:
+        raise ValueError("Unsupported file format. Upload CSV or Excel only.")
+    missing = missing_columns(df.columns)
+    if missing:
+        raise MissingColumnsError(missing)
+    return df
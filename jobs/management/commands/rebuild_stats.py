@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from jobs.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard counters from the jobs and SKU tables."
+
+    def handle(self, *args, **options):
+        values = rebuild()
+        for key in sorted(values):
+            self.stdout.write(f"{key}: {values[key]}")
+        self.stdout.write(self.style.SUCCESS("Dashboard statistics rebuilt."))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku', models.CharField(max_length=50)),
+                ('sku_code', models.CharField(blank=True, max_length=50, null=True)),
+                ('job_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('po_number', models.CharField(max_length=50)),
+                ('po_quantity', models.PositiveIntegerField()),
+                ('po_date', models.DateField()),
+                ('unit_cost', models.DecimalField(decimal_places=1, max_digits=10)),
+                ('stock', models.PositiveIntegerField(blank=True, help_text='Available stock', null=True)),
+                ('wastage', models.PositiveIntegerField(blank=True, help_text='Wastage quantity', null=True)),
+                ('planned_date', models.DateField()),
+                ('customer_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed')], default='pending', max_length=20)),
+                ('material_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('application_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('one_up_width', models.DecimalField(blank=True, decimal_places=0, max_digits=6, null=True)),
+                ('one_up_height', models.DecimalField(blank=True, decimal_places=0, max_digits=6, null=True)),
+                ('print_sheet_width', models.DecimalField(blank=True, decimal_places=0, max_digits=6, null=True)),
+                ('print_sheet_height', models.DecimalField(blank=True, decimal_places=0, max_digits=6, null=True)),
+                ('print_sheet_size', models.CharField(blank=True, max_length=50, null=True)),
+                ('ups', models.PositiveIntegerField(blank=True, null=True)),
+                ('purchase_sheet_width', models.DecimalField(blank=True, decimal_places=0, max_digits=6, null=True)),
+                ('purchase_sheet_height', models.DecimalField(blank=True, decimal_places=0, max_digits=6, null=True)),
+                ('purchase_sheet_size', models.CharField(blank=True, max_length=50, null=True)),
+                ('purchase_ups', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
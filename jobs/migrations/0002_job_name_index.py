@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='job_name',
+            field=models.CharField(blank=True, db_index=True, max_length=200, null=True),
+        ),
+    ]
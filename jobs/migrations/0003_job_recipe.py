@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_name_index'),
+        ('recipes', '0002_importtask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='recipe',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='recipes.skurecipe'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def link_recipes(apps, schema_editor):
+    """Point every existing job at the recipe whose sku_name it stores, in one UPDATE."""
+    Job = apps.get_model('jobs', 'Job')
+    SKURecipe = apps.get_model('recipes', 'SKURecipe')
+    Job.objects.filter(recipe__isnull=True).update(
+        recipe=Subquery(SKURecipe.objects.filter(sku_name=OuterRef('sku')).values('pk')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_job_recipe'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_recipes, migrations.RunPython.noop),
+    ]
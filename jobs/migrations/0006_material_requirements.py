@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='JobMaterialRequirement',
+            fields=[
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='material_requirement', serialize=False, to='jobs.job')),
+                ('status', models.CharField(max_length=20)),
+                ('planned_date', models.DateField()),
+                ('material_type', models.CharField(blank=True, default='', max_length=100)),
+                ('print_sheet_size', models.CharField(blank=True, default='', max_length=50)),
+                ('purchase_sheet_size', models.CharField(blank=True, default='', max_length=50)),
+                ('quantity_to_print', models.PositiveIntegerField(default=0)),
+                ('print_sheets', models.PositiveIntegerField(default=0)),
+                ('purchase_sheets', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['planned_date', 'status'], name='jobmaterial_date_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_material_requirements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Machine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('sheets_per_hour', models.PositiveIntegerField(help_text='Print sheets per running hour')),
+                ('hours_per_day', models.DecimalField(decimal_places=1, default=8, help_text='Working hours per day', max_digits=4)),
+                ('setup_minutes', models.PositiveIntegerField(default=0, help_text='Make-ready time per job')),
+                ('materials', models.CharField(blank=True, default='', help_text='Comma-separated material types this machine prints (blank = any)', max_length=500)),
+                ('application_types', models.CharField(blank=True, default='', help_text='Comma-separated application types this machine handles (blank = any)', max_length=500)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+    ]
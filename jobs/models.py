@@ -1,12 +1,57 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from recipes.models import SKURecipe
+from recipes.recipe_cache import get_recipe
 from django.contrib.auth.models import User
-import datetime
+
+from core.sequences import acurrent, current, reserve
+
+
+# Recipe fields copied onto every job when it is saved
+RECIPE_SNAPSHOT_FIELDS = [
+    'sku_code', 'material_type', 'application_type',
+    'one_up_width', 'one_up_height',
+    'print_sheet_width', 'print_sheet_height', 'print_sheet_size', 'ups',
+    'purchase_sheet_width', 'purchase_sheet_height', 'purchase_sheet_size', 'purchase_ups',
+]
+
+
+def _job_name_prefix(month_year):
+    return f"JC-{month_year}-"
+
+
+def job_month_year(date=None):
+    """'<month>-<year>' as used inside JC# numbers, e.g. '9-2025'."""
+    date = date or timezone.localdate()
+    return f"{date.month}-{date.year}"
+
+
+def format_job_name(month_year, number):
+    return f"{_job_name_prefix(month_year)}{number:04d}"
+
+
+def _month_job_names(month_year):
+    """JC#s of a month, via a range on the indexed job_name column instead of a LIKE scan."""
+    prefix = _job_name_prefix(month_year)
+    return Job.objects.filter(job_name__gte=prefix, job_name__lt=prefix + "\uffff").values_list("job_name", flat=True)
+
+
+def _highest_number(month_year, names):
+    prefix = _job_name_prefix(month_year)
+    numbers = [int(name[len(prefix):]) for name in names if name[len(prefix):].isdigit()]
+    return max(numbers, default=0)
+
+
+def _last_job_number(month_year):
+    """Highest JC# number already used in a month; seeds that month's sequence."""
+    return _highest_number(month_year, _month_job_names(month_year))
+
 
 class Job(models.Model):
-    sku = models.CharField(max_length=50)  # Store the SKU code here
+    sku = models.CharField(max_length=50)  # SKU name as entered on the job
+    recipe = models.ForeignKey(SKURecipe, on_delete=models.SET_NULL, blank=True, null=True, related_name='jobs')
     sku_code = models.CharField(max_length=50, blank=True, null=True)  # SKU code field
-    job_name = models.CharField(max_length=200, blank=True, null=True)  # JC# (Job Code)
+    job_name = models.CharField(max_length=200, blank=True, null=True, db_index=True)  # JC# (Job Code)
 
     # --- PO-specific fields ---
     po_number = models.CharField(max_length=50)
@@ -21,6 +66,7 @@ class Job(models.Model):
     notes = models.TextField(blank=True, null=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Bulk updates must set it too (see jobs.planning)
 
     # Status
     STATUS_CHOICES = [
@@ -28,6 +74,7 @@ class Job(models.Model):
         ('in_progress', 'In Progress'),
         ('completed', 'Completed')
     ]
+    OPEN_STATUSES = ['pending', 'in_progress']  # Jobs still to be produced
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
 
     # --- Recipe fields ---
@@ -44,33 +91,75 @@ class Job(models.Model):
     purchase_sheet_size = models.CharField(max_length=50, blank=True, null=True)
     purchase_ups = models.PositiveIntegerField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination key for job_list (see core.pagination)
+            models.Index(fields=['created_at', 'id'], name='job_created_id_idx'),
+            # Cursor of the change-ordered API listing (see core.api)
+            models.Index(fields=['updated_at', 'id'], name='job_updated_id_idx'),
+        ]
+
+    # (status, planned_date) as last read from or written to the database; see jobs.signals
+    _stats_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in instance.__dict__ and 'planned_date' in instance.__dict__:
+            instance._stats_state = (instance.status, instance.planned_date)
+        return instance
+
+    def apply_recipe(self, recipe):
+        """Link the recipe and copy its snapshot fields from a recipe dict (see recipes.recipe_cache)."""
+        self.recipe_id = recipe['id']
+        for field in RECIPE_SNAPSHOT_FIELDS:
+            setattr(self, field, recipe[field])
+
+    @staticmethod
+    def job_name_sequence(month_year):
+        return f"job_name:{month_year}"
+
+    @classmethod
+    def allocate_job_names(cls, count=1, date=None):
+        """Reserve ``count`` consecutive JC# numbers in the month of ``date`` (default: today)."""
+        month_year = job_month_year(date)
+        first = reserve(cls.job_name_sequence(month_year), count, seed=lambda: _last_job_number(month_year))
+        return [format_job_name(month_year, number) for number in range(first, first + count)]
+
+    @classmethod
+    def last_job_number(cls, month_year):
+        """The most recently assigned JC# number of a month (0 if none yet)."""
+        number = current(cls.job_name_sequence(month_year))
+        if number is None:
+            number = _last_job_number(month_year)
+        return number
+
+    @classmethod
+    async def alast_job_number(cls, month_year):
+        """Async last_job_number."""
+        number = await acurrent(cls.job_name_sequence(month_year))
+        if number is None:
+            names = [name async for name in _month_job_names(month_year)]
+            number = _highest_number(month_year, names)
+        return number
+
     def save(self, *args, **kwargs):
-        # Generate the JC# (Job Code) before saving
-        if not self.job_name:  # Ensure JC# is set only if not already set
-            currentMonth = datetime.datetime.now().month
-            currentYear = datetime.datetime.now().year
-            self.job_name = f"JC-{currentMonth}-{currentYear}-{self.pk or '0000'}"
+        # Assign the JC# (Job Code) on insert from the per-month sequence
+        if not self.job_name:
+            self.job_name = self.allocate_job_names()[0]
+
+        # Partial saves (e.g. a status change) leave the recipe snapshot alone
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'sku' not in update_fields:
+            super().save(*args, **kwargs)
+            return
 
         if self.sku:  # If SKU is provided
-            try:
-                # Fetch the SKURecipe instance based on the SKU
-                sku_recipe = SKURecipe.objects.get(sku_name=self.sku)
-                # Populate fields with the fetched recipe's data
-                self.sku_code = sku_recipe.sku_code
-                self.material_type = sku_recipe.material_type
-                self.application_type = sku_recipe.application_type
-                self.one_up_width = sku_recipe.one_up_width
-                self.one_up_height = sku_recipe.one_up_height
-                self.print_sheet_width = sku_recipe.print_sheet_width
-                self.print_sheet_height = sku_recipe.print_sheet_height
-                self.print_sheet_size = sku_recipe.print_sheet_size
-                self.ups = sku_recipe.ups
-                self.purchase_sheet_width = sku_recipe.purchase_sheet_width
-                self.purchase_sheet_height = sku_recipe.purchase_sheet_height
-                self.purchase_sheet_size = sku_recipe.purchase_sheet_size
-                self.purchase_ups = sku_recipe.purchase_ups
-            except SKURecipe.DoesNotExist:
+            # Served from the per-process recipe cache when the view already looked it up
+            sku_recipe = get_recipe(self.sku)
+            if sku_recipe is None:
                 raise ValueError("The specified SKU does not have an associated recipe.")
+            self.apply_recipe(sku_recipe)
         
         # Ensure stock and wastage are integers or set them to 0 if empty
         if self.stock is None:
@@ -80,13 +169,99 @@ class Job(models.Model):
 
         super().save(*args, **kwargs)
 
-    def mark_as_completed(self):
-        self.status = 'completed'
-        self.save()
+    def change_status(self, status, user=None):
+        """Move the job to ``status``, writing only that column plus a history row."""
+        if status == self.status:
+            return False
+        previous = self.status
+        self.status = status
+        with transaction.atomic():
+            self.save(update_fields=['status', 'updated_at'])
+            JobStatusChange.objects.create(job=self, from_status=previous, to_status=status, changed_by=user)
+        return True
+
+    def mark_as_completed(self, user=None):
+        return self.change_status('completed', user)
 
-    def mark_as_in_progress(self):
-        self.status = 'in_progress'
-        self.save()
+    def mark_as_in_progress(self, user=None):
+        return self.change_status('in_progress', user)
 
     def __str__(self):
         return f"JC#{self.job_name} - {self.sku_code}"
+
+
+class JobMaterialRequirement(models.Model):
+    """Sheets one job needs, cached by jobs.planning and recomputed when the job changes."""
+
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True, related_name='material_requirement')
+
+    # Copied from the job so the rollup never has to join it
+    status = models.CharField(max_length=20)
+    planned_date = models.DateField()
+    material_type = models.CharField(max_length=100, blank=True, default='')
+    print_sheet_size = models.CharField(max_length=50, blank=True, default='')
+    purchase_sheet_size = models.CharField(max_length=50, blank=True, default='')
+
+    quantity_to_print = models.PositiveIntegerField(default=0)  # po_quantity + wastage - stock
+    print_sheets = models.PositiveIntegerField(default=0)
+    purchase_sheets = models.PositiveIntegerField(default=0)
+
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['planned_date', 'status'], name='jobmaterial_date_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}: {self.purchase_sheets} x {self.material_type} {self.purchase_sheet_size}"
+
+
+class JobStatusChange(models.Model):
+    """Append-only history of job status transitions."""
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20)
+    to_status = models.CharField(max_length=20)
+    changed_at = models.DateTimeField(default=timezone.now)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'changed_at'], name='jobstatus_job_changed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}: {self.from_status} → {self.to_status}"
+
+
+class Machine(models.Model):
+    """A press the scheduler can load jobs onto (see jobs.scheduling)."""
+
+    name = models.CharField(max_length=100, unique=True)
+    sheets_per_hour = models.PositiveIntegerField(help_text="Print sheets per running hour")
+    hours_per_day = models.DecimalField(max_digits=4, decimal_places=1, default=8, help_text="Working hours per day")
+    setup_minutes = models.PositiveIntegerField(default=0, help_text="Make-ready time per job")
+    materials = models.CharField(
+        max_length=500, blank=True, default='',
+        help_text="Comma-separated material types this machine prints (blank = any)",
+    )
+    application_types = models.CharField(
+        max_length=500, blank=True, default='',
+        help_text="Comma-separated application types this machine handles (blank = any)",
+    )
+    is_active = models.BooleanField(default=True)
+
+    def material_set(self):
+        return _name_set(self.materials)
+
+    def application_type_set(self):
+        return _name_set(self.application_types)
+
+    def __str__(self):
+        return self.name
+
+
+def _name_set(value):
+    """Lower-cased names of a comma-separated list; empty means 'any'."""
+    return frozenset(part.strip().lower() for part in value.split(',') if part.strip())
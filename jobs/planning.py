@@ -0,0 +1,150 @@
+"""
+Material requirements planning.
+
+For every job the sheets it needs are::
+
+    quantity_to_print = max(po_quantity + wastage - stock, 0)
+    print_sheets      = ceil(quantity_to_print / ups)
+    purchase_sheets   = ceil(print_sheets / purchase_ups)
+
+They are computed in SQL for all stale jobs in one statement and cached in
+JobMaterialRequirement. A cached row is stale once its job's updated_at is
+newer than its computed_at, so a refresh only touches jobs changed since the
+last one. The rollup aggregates the cached rows by material, sheet size and
+date window in a single GROUP BY.
+"""
+import datetime
+
+from django.db import connection
+from django.db.models import CharField, Case, Count, DateTimeField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, Greatest
+from django.utils import timezone
+
+from .models import Job, JobMaterialRequirement
+
+
+# Report windows: name -> period (None = one total over the whole range)
+WINDOWS = {"month": "month", "week": "week", "all": None}
+
+GROUP_FIELDS = ["material_type", "print_sheet_size", "purchase_sheet_size"]
+SUM_FIELDS = ["jobs", "missing_ups", "quantity_to_print", "print_sheets", "purchase_sheets"]
+
+def _ceil_div(numerator, denominator):
+    """ceil(numerator / denominator) in integer SQL; 0 when the denominator is missing or 0."""
+    return Case(
+        When(**{f"{denominator}__gt": 0}, then=(numerator + F(denominator) - 1) / F(denominator)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _sheet_label(prefix):
+    """'500x700' from the job's sheet dimensions when both are known, else its free-text size."""
+    width, height = f"{prefix}_width", f"{prefix}_height"
+    return Case(
+        When(
+            Q(**{f"{width}__gt": 0, f"{height}__gt": 0}),
+            then=Concat(Cast(width, IntegerField()), Value("x"), Cast(height, IntegerField())),
+        ),
+        default=Coalesce(f"{prefix}_size", Value("")),
+        output_field=CharField(),
+    )
+
+
+def stale_jobs():
+    """Jobs with no cached requirement, or changed since it was computed."""
+    return Job.objects.filter(
+        Q(material_requirement__isnull=True) | Q(updated_at__gt=F("material_requirement__computed_at"))
+    )
+
+
+def refresh_requirements():
+    """
+    Recompute the cached requirements of every stale job in one
+    INSERT ... SELECT ... ON CONFLICT statement; returns the rows written.
+    """
+    # Taken before reading, so a job saved while we run stays stale for next time
+    computed_at = timezone.now()
+
+    # Annotations only, in REQUIREMENT_COLUMNS order, so the SELECT list lines
+    # up with the INSERT column list.
+    need = Greatest(F("po_quantity") + Coalesce("wastage", 0) - Coalesce("stock", 0), Value(0))
+    prints = _ceil_div(need, "ups")
+    columns = {
+        "job_id": F("pk"),
+        "status": F("status"),
+        "planned_date": F("planned_date"),
+        "material_type": Coalesce("material_type", Value("")),
+        "print_sheet_size": _sheet_label("print_sheet"),
+        "purchase_sheet_size": _sheet_label("purchase_sheet"),
+        "quantity_to_print": need,
+        "print_sheets": prints,
+        "purchase_sheets": _ceil_div(prints, "purchase_ups"),
+        "computed_at": Value(computed_at, output_field=DateTimeField()),
+    }
+    aliases = {f"_{name}": expression for name, expression in columns.items()}
+    select = stale_jobs().order_by().annotate(**aliases).values_list(*aliases)
+    select_sql, params = select.query.sql_with_params()
+
+    table = JobMaterialRequirement._meta.db_table
+    qn = connection.ops.quote_name
+    updates = ", ".join(f"{qn(name)} = excluded.{qn(name)}" for name in columns if name != "job_id")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(table)} ({', '.join(qn(name) for name in columns)}) {select_sql} "
+            f"ON CONFLICT ({qn('job_id')}) DO UPDATE SET {updates}",
+            params,
+        )
+        return cursor.rowcount
+
+
+def _period_start(date, window):
+    if window == "month":
+        return date.replace(day=1)
+    if window == "week":
+        return date - datetime.timedelta(days=date.weekday())
+    return None
+
+
+def rollup(start=None, end=None, statuses=None, window="month"):
+    """
+    Cached requirements summed per (window, material, print sheet, purchase
+    sheet) for jobs planned between ``start`` and ``end`` (inclusive) whose
+    status is in ``statuses`` (default: open jobs). Returns a list of dicts.
+    """
+    requirements = JobMaterialRequirement.objects.filter(status__in=statuses or Job.OPEN_STATUSES)
+    if start:
+        requirements = requirements.filter(planned_date__gte=start)
+    if end:
+        requirements = requirements.filter(planned_date__lte=end)
+
+    # The database groups by day; days are folded into windows here, which
+    # avoids a per-row date truncation function on SQLite.
+    daily = requirements.values("planned_date", *GROUP_FIELDS).annotate(
+        jobs=Count("pk"),
+        # Jobs with something to print but no ups cannot be planned
+        missing_ups=Count("pk", filter=Q(print_sheets=0, quantity_to_print__gt=0)),
+        quantity_to_print=Sum("quantity_to_print"),
+        print_sheets=Sum("print_sheets"),
+        purchase_sheets=Sum("purchase_sheets"),
+    ).order_by()
+
+    windowed = WINDOWS.get(window) is not None
+    rows = {}
+    for day in daily:
+        key = tuple(day[field] for field in GROUP_FIELDS)
+        if windowed:
+            key = (_period_start(day["planned_date"], window),) + key
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = dict(zip((["period"] if windowed else []) + GROUP_FIELDS, key))
+            row.update({field: 0 for field in SUM_FIELDS})
+        for field in SUM_FIELDS:
+            row[field] += day[field]
+    return [rows[key] for key in sorted(rows)]
+
+
+def material_report(start=None, end=None, statuses=None, window="month"):
+    """Refresh what changed, then return the rollup rows."""
+    refresh_requirements()
+    return rollup(start, end, statuses, window)
@@ -0,0 +1,154 @@
+"""
+Earliest-due-date production scheduling.
+
+Open jobs come off a heap ordered by (in progress first, planned_date, id),
+and each one goes on the eligible machine that frees up first. Machines are
+grouped by the (material, application type) class of jobs they can run, and
+each class keeps a heap of (free_at, machine) entries. When a machine takes a
+job, its new free time is pushed onto every class heap it belongs to.
+Outdated entries are dropped lazily once they reach the top, so an
+assignment costs O(log m) instead of a scan over all machines.
+
+Machine clocks count working hours from the start of the schedule's first
+day. Each day supplies that machine's hours_per_day, starting at WORKDAY_START.
+"""
+import datetime
+import heapq
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, Machine
+from .planning import refresh_requirements
+
+
+WORKDAY_START = datetime.time(8, 0)
+
+
+class Schedule:
+    def __init__(self, start_date, machines):
+        self.start_date = start_date
+        self.machines = machines
+        self.queues = {machine.name: [] for machine in machines}
+        self.unscheduled = []
+
+    @property
+    def scheduled_count(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    @property
+    def late_count(self):
+        return sum(entry["late"] for queue in self.queues.values() for entry in queue)
+
+    def summary(self):
+        """Per-machine job count, late jobs and finish time."""
+        return [
+            {
+                "machine": name,
+                "jobs": len(queue),
+                "late": sum(entry["late"] for entry in queue),
+                "busy_until": queue[-1]["end"] if queue else None,
+            }
+            for name, queue in self.queues.items()
+        ]
+
+    def as_dict(self):
+        return {
+            "start_date": self.start_date,
+            "machines": [{**row, "queue": self.queues[row["machine"]]} for row in self.summary()],
+            "unscheduled": self.unscheduled,
+        }
+
+
+def _runs(machine, material, application_type):
+    materials, applications = machine.material_set(), machine.application_type_set()
+    return (not materials or material in materials) and (not applications or application_type in applications)
+
+
+def _clock_to_datetime(start_date, hours, hours_per_day, is_end=False):
+    """Working-hours offset -> wall-clock time; an end on a day boundary stays on the earlier day."""
+    day, within = divmod(hours, hours_per_day)
+    if is_end and within == 0 and day > 0:
+        day, within = day - 1, hours_per_day
+    day_start = datetime.datetime.combine(start_date + datetime.timedelta(days=int(day)), WORKDAY_START)
+    return day_start + datetime.timedelta(hours=within)
+
+
+def build_schedule(jobs, machines, start_date=None):
+    """
+    Sequence ``jobs`` (dicts with id, job_name, sku, material_type,
+    application_type, planned_date, status and print_sheets) onto
+    ``machines`` and return a Schedule.
+    """
+    start_date = start_date or timezone.localdate()
+    schedule = Schedule(start_date, machines)
+
+    pending = [
+        (job["status"] != "in_progress", job["planned_date"], job["id"], job)
+        for job in jobs
+    ]
+    heapq.heapify(pending)
+
+    free_at = [0.0] * len(machines)
+    hours_per_day = [float(machine.hours_per_day) or 24.0 for machine in machines]
+    pools = {}                                  # (material, application) -> heap of (free_at, index)
+    member_of = [[] for _ in machines]          # machine index -> the pools it is in
+
+    def pool_for(key):
+        pool = pools.get(key)
+        if pool is None:
+            members = [i for i, machine in enumerate(machines) if _runs(machine, *key)]
+            pool = pools[key] = [(free_at[i], i) for i in members]
+            heapq.heapify(pool)
+            for i in members:
+                member_of[i].append(pool)
+        return pool
+
+    while pending:
+        *_, job = heapq.heappop(pending)
+        material = (job["material_type"] or "").strip().lower()
+        application_type = (job["application_type"] or "").strip().lower()
+        if not job["print_sheets"]:
+            schedule.unscheduled.append({**job, "reason": "Nothing to print, or the job has no ups"})
+            continue
+
+        pool = pool_for((material, application_type))
+        while pool and pool[0][0] != free_at[pool[0][1]]:
+            heapq.heappop(pool)  # outdated entry
+        if not pool:
+            schedule.unscheduled.append({
+                **job, "reason": f"No active machine runs {job['material_type']} / {job['application_type']}",
+            })
+            continue
+
+        begin, i = pool[0]
+        machine = machines[i]
+        end = begin + machine.setup_minutes / 60 + job["print_sheets"] / machine.sheets_per_hour
+        free_at[i] = end
+        for member_pool in member_of[i]:
+            heapq.heappush(member_pool, (end, i))
+
+        finish = _clock_to_datetime(start_date, end, hours_per_day[i], is_end=True)
+        schedule.queues[machine.name].append({
+            **job,
+            "machine": machine.name,
+            "start": _clock_to_datetime(start_date, begin, hours_per_day[i]),
+            "end": finish,
+            "hours": round(end - begin, 2),
+            "late": finish.date() > job["planned_date"],
+        })
+    return schedule
+
+
+def open_jobs():
+    """Pending and in-progress jobs with their print sheets (from the material requirement cache)."""
+    refresh_requirements()
+    return Job.objects.filter(status__in=Job.OPEN_STATUSES).order_by().values(
+        "id", "job_name", "sku", "material_type", "application_type", "planned_date", "status",
+        print_sheets=F("material_requirement__print_sheets"),
+    )
+
+
+def schedule_open_jobs(start_date=None):
+    machines = list(Machine.objects.filter(is_active=True, sheets_per_hour__gt=0).order_by("name"))
+    return build_schedule(open_jobs(), machines, start_date)
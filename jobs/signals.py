@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Job
+from .stats import count_jobs, record_change
+
+
+@receiver(pre_save, sender=Job)
+@receiver(pre_delete, sender=Job)
+def remember_stats_state(sender, instance, **kwargs):
+    # Jobs not loaded through the ORM (or loaded with deferred fields) need
+    # their stored status and planned date to move the counters correctly.
+    if instance.pk is not None and instance._stats_state is None:
+        instance._stats_state = (
+            Job.objects.filter(pk=instance.pk).values_list("status", "planned_date").first()
+        )
+
+
+@receiver(post_save, sender=Job)
+def count_saved_job(sender, instance, created, **kwargs):
+    new_state = (instance.status, instance.planned_date)
+    if created:
+        count_jobs([new_state])
+    elif instance._stats_state is not None and instance._stats_state != new_state:
+        record_change([instance._stats_state], [new_state])
+    instance._stats_state = new_state
+
+
+@receiver(post_delete, sender=Job)
+def count_deleted_job(sender, instance, **kwargs):
+    if instance._stats_state is not None:
+        count_jobs([instance._stats_state], delta=-1)
@@ -0,0 +1,102 @@
+"""
+Dashboard counters for jobs and SKUs (stored through core.stats).
+
+Keys:
+    jobs:total              every job
+    jobs:status:<status>    jobs per status
+    jobs:due:<YYYY>-W<WW>   open (not completed) jobs planned in that ISO week
+    skus:total              catalog size (maintained by the recipes app)
+
+Saves and deletes are counted by jobs.signals; code that bulk-creates or
+bulk-updates jobs must call ``count_jobs``/``record_change`` itself.
+"""
+from collections import Counter
+
+from django.db.models import Count
+from django.utils import timezone
+
+from core.stats import adjust, get_many, replace
+from recipes.models import SKU_TOTAL_STAT, SKURecipe
+
+from .models import Job
+
+
+JOBS_TOTAL = "jobs:total"
+JOB_PREFIX = "jobs:"
+SKU_PREFIX = "skus:"
+# Present once the counters have been computed from the tables at least once
+BUILT = "stats:built"
+
+OPEN_STATUSES = Job.OPEN_STATUSES
+
+
+def status_key(status):
+    return f"jobs:status:{status}"
+
+
+def due_key(date):
+    year, week, _ = date.isocalendar()
+    return f"jobs:due:{year}-W{week:02d}"
+
+
+def job_keys(status, planned_date):
+    """The counters one job with ``status`` and ``planned_date`` contributes 1 to."""
+    keys = [JOBS_TOTAL, status_key(status)]
+    if status in OPEN_STATUSES and planned_date:
+        keys.append(due_key(planned_date))
+    return keys
+
+
+def count_jobs(states, delta=1):
+    """Add ``delta`` for each ``(status, planned_date)`` in ``states`` (bulk create/delete)."""
+    deltas = Counter()
+    for status, planned_date in states:
+        for key in job_keys(status, planned_date):
+            deltas[key] += delta
+    adjust(deltas)
+
+
+def record_change(old_states, new_states):
+    """Move jobs from their old ``(status, planned_date)`` to the new ones (bulk updates)."""
+    deltas = Counter()
+    for status, planned_date in old_states:
+        for key in job_keys(status, planned_date):
+            deltas[key] -= 1
+    for status, planned_date in new_states:
+        for key in job_keys(status, planned_date):
+            deltas[key] += 1
+    adjust(deltas)
+
+
+def rebuild():
+    """Recompute every dashboard counter from the jobs and SKU tables."""
+    values = Counter({JOBS_TOTAL: 0, SKU_TOTAL_STAT: SKURecipe.objects.count(), BUILT: 1})
+    for row in Job.objects.order_by().values("status").annotate(n=Count("id")):
+        values[status_key(row["status"])] += row["n"]
+        values[JOBS_TOTAL] += row["n"]
+    open_by_date = (
+        Job.objects.filter(status__in=OPEN_STATUSES)
+        .order_by().values("planned_date").annotate(n=Count("id"))
+    )
+    for row in open_by_date:
+        values[due_key(row["planned_date"])] += row["n"]
+    replace([JOB_PREFIX, SKU_PREFIX, BUILT], values)
+    return dict(values)
+
+
+def dashboard(today=None):
+    """Counters shown on the home page, read in one query."""
+    today = today or timezone.localdate()
+    week = due_key(today)
+    keys = [JOBS_TOTAL, SKU_TOTAL_STAT, week, BUILT] + [status_key(s) for s, _ in Job.STATUS_CHOICES]
+    values = get_many(keys)
+    if not values[BUILT]:
+        # First visit since the counters were introduced
+        rebuild()
+        values = get_many(keys)
+    return {
+        "jobs_total": values[JOBS_TOTAL],
+        "skus_total": values[SKU_TOTAL_STAT],
+        "due_this_week": values[week],
+        "by_status": [(label, values[status_key(status)]) for status, label in Job.STATUS_CHOICES],
+    }
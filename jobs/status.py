@@ -0,0 +1,53 @@
+"""
+Bulk job status transitions.
+
+Jobs are moved with a single UPDATE (status and updated_at), the
+transitions are appended to JobStatusChange with bulk_create, and the
+dashboard counters are adjusted in the same transaction (retried while the
+database is locked, see core.db).
+"""
+from django.utils import timezone
+
+from core.db import atomic_write
+
+from .models import Job, JobStatusChange
+from .stats import record_change
+
+
+# Ids per UPDATE ... WHERE id IN (...), under SQLite's bound-parameter limit
+UPDATE_CHUNK_SIZE = 900
+
+STATUSES = [status for status, _ in Job.STATUS_CHOICES]
+
+
+@atomic_write
+def bulk_change_status(job_ids, status, user=None):
+    """Move the jobs in ``job_ids`` to ``status``; returns how many changed."""
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+
+    jobs = list(
+        Job.objects.filter(pk__in=job_ids).exclude(status=status)
+        .values_list('pk', 'status', 'planned_date')
+    )
+    if not jobs:
+        return 0
+
+    now = timezone.now()
+    ids = [pk for pk, _, _ in jobs]
+    for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+        Job.objects.filter(pk__in=ids[start:start + UPDATE_CHUNK_SIZE]).update(status=status, updated_at=now)
+
+    JobStatusChange.objects.bulk_create(
+        [
+            JobStatusChange(job_id=pk, from_status=previous, to_status=status, changed_at=now, changed_by=user)
+            for pk, previous, _ in jobs
+        ],
+        batch_size=500,
+    )
+    # Queryset updates send no post_save signals
+    record_change(
+        [(previous, planned_date) for _, previous, planned_date in jobs],
+        [(status, planned_date) for _, _, planned_date in jobs],
+    )
+    return len(jobs)
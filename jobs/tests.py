@@ -1,3 +1,256 @@
-from django.test import TestCase
+import asyncio
+import datetime
 
-# Create your tests here.
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from core import metrics
+from core.stats import get_many
+from recipes import recipe_cache
+from recipes.models import SKURecipe
+from recipes.tests import make_sku
+
+from . import stats
+from .importer import import_dataframe
+from .models import Job, JobStatusChange, Machine, job_month_year
+from .planning import material_report
+from .scheduling import schedule_open_jobs
+from .status import bulk_change_status
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+PLANNED = datetime.date(2025, 9, 10)
+
+
+def make_job(sku="Clothing Tag", **fields):
+    values = dict(
+        sku=sku, po_number="PO-1", po_quantity=1000, po_date=datetime.date(2025, 9, 1),
+        unit_cost=1, planned_date=PLANNED,
+    )
+    values.update(fields)
+    return Job.objects.create(**values)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobTestCase(TestCase):
+    def setUp(self):
+        recipe_cache.bump_version()
+        # Two print sheets per purchase sheet, for the planning sums
+        self.recipe = make_sku("Clothing Tag", purchase_sheet_width=1000, purchase_sheet_height=700, purchase_ups=2)
+
+
+class JobSaveTests(JobTestCase):
+    def test_recipe_snapshot_and_job_codes(self):
+        first, second = make_job(), make_job()
+        month_year = job_month_year()
+        self.assertEqual(first.job_name, f"JC-{month_year}-0001")
+        self.assertEqual(second.job_name, f"JC-{month_year}-0002")
+        self.assertEqual((first.recipe_id, first.sku_code, first.ups), (self.recipe.pk, self.recipe.sku_code, 100))
+
+    def test_export_keeps_the_sku_of_a_deleted_recipe(self):
+        make_job()
+        self.recipe.delete()
+        response = self.client.get(reverse("job-export"))
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[1].split(",")[1:3], ["Clothing Tag", self.recipe.sku_code])
+
+    def test_unknown_sku_is_rejected(self):
+        with self.assertRaises(ValueError):
+            make_job(sku="Nope")
+
+
+class QueryBudgetTests(JobTestCase):
+    def test_home(self):
+        for _ in range(10):
+            make_job()
+        self.client.get(reverse("home"))  # builds the counters on first visit
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("home"))
+        self.assertEqual(response.context["stats"]["jobs_total"], 10)
+        self.assertEqual(len(response.context["recent_jobs"]), 5)
+
+    def test_job_list(self):
+        for _ in range(10):
+            make_job()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("job-list"))
+            self.assertEqual(len(response.context["jobs"]), 10)
+
+    def test_fetch_recipe_is_served_from_memory(self):
+        self.client.get(reverse("fetch_recipe") + "?sku=Clothing+Tag")
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("fetch_recipe") + "?sku=Clothing+Tag")
+        self.assertEqual(response.json()["ups"], 100)
+        revalidated = self.client.get(reverse("fetch_recipe") + "?sku=Clothing+Tag", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_fetch_recipes_is_one_query(self):
+        make_sku("Care Label")
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("fetch_recipes") + f"?sku=Clothing+Tag&sku=Nope&code={self.recipe.sku_code}")
+        data = response.json()
+        self.assertEqual(list(data["skus"]), ["Clothing Tag"])
+        self.assertEqual(list(data["codes"]), [self.recipe.sku_code])
+        self.assertEqual(data["missing"], ["Nope"])
+
+    def test_fetch_recipes_revalidates_on_the_etag_only(self):
+        url = reverse("fetch_recipes") + "?sku=Clothing+Tag&sku=Care+Label"
+        make_sku("Care Label")
+        response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        # Deleting one recipe leaves the newest updated_at where it was
+        SKURecipe.objects.filter(sku_name="Care Label").delete()
+        after = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json()["missing"], ["Care Label"])
+
+    def test_get_last_job_code(self):
+        make_job()
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse("get_last_job_code")).json()
+        self.assertTrue(data["next_job_code"].endswith("-0002"))
+
+
+class AsyncLookupTests(JobTestCase):
+    async def test_concurrent_misses_share_one_query(self):
+        metrics.reset()
+        url = reverse("fetch_recipe") + "?sku=Clothing+Tag"
+        responses = await asyncio.gather(*(self.async_client.get(url) for _ in range(20)))
+        self.assertEqual({response.json()["ups"] for response in responses}, {100})
+        self.assertEqual(metrics.QUERIES.series[("fetch_recipe",)][-2:], [1, 20])  # queries, requests
+
+    async def test_get_last_job_code(self):
+        await sync_to_async(make_job)()
+        data = (await self.async_client.get(reverse("get_last_job_code"))).json()
+        self.assertTrue(data["last_job_code"].endswith("-0001"))
+        self.assertTrue(data["next_job_code"].endswith("-0002"))
+
+
+class StatsTests(JobTestCase):
+    def assertCountersMatchRebuild(self):
+        keys = [stats.JOBS_TOTAL, stats.due_key(PLANNED)] + [stats.status_key(s) for s in Job.OPEN_STATUSES + ["completed"]]
+        incremental = get_many(keys)
+        stats.rebuild()
+        self.assertEqual(incremental, get_many(keys))
+
+    def test_signals_and_bulk_paths_keep_counters_exact(self):
+        stats.rebuild()
+        jobs = [make_job() for _ in range(4)]
+        jobs[0].mark_as_in_progress()
+        jobs[1].delete()
+        bulk_change_status([jobs[2].pk, jobs[3].pk], "completed")
+        self.assertCountersMatchRebuild()
+        self.assertEqual(get_many([stats.due_key(PLANNED)]), {stats.due_key(PLANNED): 1})
+
+
+class BulkStatusTests(JobTestCase):
+    def test_only_changed_jobs_are_recorded(self):
+        jobs = [make_job() for _ in range(3)]
+        jobs[0].mark_as_completed()
+        self.assertEqual(bulk_change_status([job.pk for job in jobs], "completed"), 2)
+        self.assertEqual(Job.objects.filter(status="completed").count(), 3)
+        self.assertEqual(JobStatusChange.objects.filter(to_status="completed").count(), 3)
+
+    def test_unknown_status(self):
+        with self.assertRaises(ValueError):
+            bulk_change_status([], "lost")
+
+    def test_view_skips_malformed_ids(self):
+        job = make_job()
+        response = self.client.post(reverse("job-bulk-status"), {
+            "selected_jobs": [str(job.pk), "abc", "1.5", "-2", "9" * 30], "status": "completed",
+        })
+        self.assertRedirects(response, reverse("job-list"))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, "completed")
+
+
+class PlanningTests(JobTestCase):
+    def test_sheets_per_material(self):
+        make_job(po_quantity=1000, wastage=50, stock=10)   # 1040 to print -> 11 sheets -> 6 purchase
+        make_job(po_quantity=200)                          # 2 sheets -> 1 purchase
+        make_job(po_quantity=5000, status="completed")     # excluded below
+        rows = material_report(statuses=Job.OPEN_STATUSES, window="all")
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row["material_type"], row["print_sheet_size"], row["purchase_sheet_size"]),
+                         ("Art Paper", "500x700", "1000x700"))
+        self.assertEqual((row["jobs"], row["quantity_to_print"], row["print_sheets"], row["purchase_sheets"]),
+                         (2, 1240, 13, 7))
+
+    def test_edits_refresh_the_cache(self):
+        job = make_job(po_quantity=1000)
+        material_report(window="all")
+        job.po_quantity = 2000
+        job.save()
+        self.assertEqual(material_report(window="all")[0]["print_sheets"], 20)
+
+
+class SchedulingTests(JobTestCase):
+    def test_earliest_due_first_without_overlap(self):
+        Machine.objects.create(name="Press 1", sheets_per_hour=10, hours_per_day=8)
+        late = make_job(po_quantity=4000, planned_date=PLANNED + datetime.timedelta(days=5))
+        early = make_job(po_quantity=4000, planned_date=PLANNED)  # 40 sheets -> 4 hours
+
+        schedule = schedule_open_jobs(start_date=PLANNED)
+        queue = schedule.queues["Press 1"]
+        self.assertEqual([entry["id"] for entry in queue], [early.pk, late.pk])
+        self.assertEqual(queue[0]["hours"], 4.0)
+        self.assertLessEqual(queue[0]["end"], queue[1]["start"])
+        self.assertEqual(schedule.late_count, 0)
+
+
+class ImporterTests(JobTestCase):
+    def test_rows_resolve_by_name_or_code(self):
+        df = pd.DataFrame([
+            {"sku": "Clothing Tag", "po_number": "A", "po_quantity": 10, "po_date": "2025-09-01",
+             "unit_cost": 1, "planned_date": "2025-09-10"},
+            {"sku": self.recipe.sku_code, "po_number": "B", "po_quantity": 10, "po_date": "2025-09-01",
+             "unit_cost": 1, "planned_date": "2025-09-10"},
+            {"sku": "Nope", "po_number": "C", "po_quantity": "ten", "po_date": "2025-09-01",
+             "unit_cost": 1, "planned_date": "2025-09-10"},
+        ])
+        self.assertEqual(import_dataframe(df), 2)
+        self.assertTrue(df["Error"].tolist()[2].startswith("Row 4: SKU 'Nope' does not exist"))
+        self.assertEqual(Job.objects.filter(recipe=self.recipe).count(), 2)
+        self.assertEqual(get_many([stats.JOBS_TOTAL]), {stats.JOBS_TOTAL: 2})
+
+    def test_out_of_range_quantities_are_row_errors(self):
+        row = {"sku": "Clothing Tag", "po_date": "2025-09-01", "unit_cost": 1, "planned_date": "2025-09-10"}
+        df = pd.DataFrame([
+            {**row, "po_number": "A", "po_quantity": "inf", "stock": 0},
+            {**row, "po_number": "B", "po_quantity": 10, "stock": str(10 ** 30)},
+            {**row, "po_number": "C", "po_quantity": 10, "stock": 5},
+        ])
+        self.assertEqual(import_dataframe(df), 1)
+        errors = df["Error"].tolist()
+        self.assertEqual(errors[0], "Row 2: Invalid po_quantity: 'inf' must be a whole number")
+        self.assertTrue(errors[1].startswith("Row 3: Invalid stock: '1000000000000000000000000000000' must be at most"))
+        self.assertEqual(errors[2], "")
+        self.assertEqual(list(Job.objects.values_list("po_number", flat=True)), ["C"])
+
+
+class ApiTests(JobTestCase):
+    def test_filters_and_sparse_fields(self):
+        make_job(customer_name="Summit Retail")
+        make_job(customer_name="Summit Retail", status="completed")
+        make_job(customer_name="Other", planned_date=PLANNED + datetime.timedelta(days=30))
+        url = reverse("api-job-list") + "?customer=summit&status=pending&status=in_progress&fields=id,status,customer_name"
+        with self.assertNumQueries(1):
+            results = self.client.get(url).json()["results"]
+        self.assertEqual(results, [{"id": results[0]["id"], "status": "pending", "customer_name": "Summit Retail"}])
+
+        url = reverse("api-job-list") + f"?planned_date_after={PLANNED + datetime.timedelta(days=1)}&fields=customer_name"
+        self.assertEqual(self.client.get(url).json()["results"], [{"customer_name": "Other"}])
+
+    def test_incremental_sync(self):
+        first, second = make_job(), make_job()
+        bulk_change_status([first.pk], "in_progress")
+        first.refresh_from_db()
+        url = reverse("api-job-list") + "?fields=id,status&updated_since=" + first.updated_at.isoformat().replace("+", "%2B")
+        self.assertEqual(self.client.get(url).json()["results"], [{"id": first.pk, "status": "in_progress"}])
+        self.assertLess(second.updated_at, first.updated_at)
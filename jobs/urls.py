@@ -5,7 +5,16 @@ urlpatterns = [
     path('', views.home, name='home'),  # Home view (formerly Dashboard)
     path('jobs/create/', views.job_create, name='job-create'),  # Job creation page
     path('jobs/', views.job_list, name='job-list'),  # List of all jobs
+    path('jobs/export/', views.job_export, name='job-export'),  # CSV export of the job list
+    path('jobs/bulk-status/', views.job_bulk_status, name='job-bulk-status'),  # Change status of selected jobs
+    path('jobs/import/', views.job_import, name='job-import'),  # Bulk job import from PO lines
+    path('jobs/import/sample/', views.job_import_sample, name='job-import-sample'),
+    path('jobs/materials/', views.material_requirements, name='material-requirements'),  # Sheets needed per material
+    path('jobs/materials/export/', views.material_requirements_export, name='material-requirements-export'),
+    path('jobs/schedule/', views.production_schedule, name='production-schedule'),  # Machine queues for open jobs
+    path('jobs/schedule.json', views.production_schedule_json, name='production-schedule-json'),
     path('fetch-recipe/', views.fetch_recipe, name='fetch_recipe'),  # Fetch recipe via SKU
+    path('fetch-recipes/', views.fetch_recipes, name='fetch_recipes'),  # Fetch many recipes in one request
     path('jobs/<int:pk>/edit/', views.job_edit, name='job-edit'),  # Edit job
     path('jobs/<int:pk>/delete/', views.job_delete, name='job-delete'),  # Delete job
     path('get_last_job_code/', views.get_last_job_code, name='get_last_job_code'), # Last job card
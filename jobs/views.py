@@ -1,26 +1,198 @@
+import calendar
+import csv
+import hashlib
+
 from django.shortcuts import render, redirect,get_object_or_404
-from .forms import JobForm
-from .models import Job
+from .forms import JobForm, JobImportForm
+from .models import Job, format_job_name, job_month_year
+from .planning import SUM_FIELDS, WINDOWS, material_report
+from .scheduling import schedule_open_jobs
+from .status import bulk_change_status
+from .stats import dashboard
 from recipes.models import SKURecipe
-from django.http import JsonResponse
+from recipes.recipe_cache import RECIPE_FIELDS, aget_recipe, get_recipe
+from django.db import connection
+from django.db.models import Q
+from django.contrib import messages
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, url_has_allowed_host_and_scheme
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from core.db import write_transaction
+from core.exports import EXPORT_CHUNK_SIZE, stream_csv
+from core.pagination import keyset_paginate
+from core.reports import ErrorReport
 
 
 # Home view (formerly Dashboard)
 def home(request):
-    jobs = Job.objects.all()  # Get all jobs
-    recent_jobs = jobs[:5]  # Get the most recent 5 jobs
-    jobs_count = jobs.count()  # Total number of jobs
-    sku_recipes = SKURecipe.objects.all()  # Fetch all recipes
+    # Counters are maintained incrementally (see jobs.stats), so this is two small reads
+    recent_jobs = Job.objects.order_by('-created_at', '-id').only(
+        'job_name', 'sku', 'sku_code', 'status', 'planned_date', 'created_at',
+    )[:5]
     return render(request, 'home.html', {
-        'jobs_count': jobs_count,
+        'stats': dashboard(),
         'recent_jobs': recent_jobs,
-        'sku_recipes': sku_recipes,
     })
 
 # Job list view
+def _recipe_filter(request):
+    """The ?recipe=<pk> filter used to list one SKU's jobs, or None."""
+    recipe_id = request.GET.get('recipe', '')
+    return int(recipe_id) if recipe_id.isdigit() else None
+
+
+def _filter_jobs(request):
+    """Jobs joined to their recipes, optionally limited to one SKU."""
+    jobs = Job.objects.select_related('recipe')
+    recipe_id = _recipe_filter(request)
+    if recipe_id:
+        jobs = jobs.filter(recipe_id=recipe_id)
+    return jobs
+
+
 def job_list(request):
-    jobs = Job.objects.all()  # Get all jobs
-    return render(request, 'jobs/job_list.html', {'jobs': jobs})
+    page = keyset_paginate(_filter_jobs(request), request.GET.get('cursor'))
+    return render(request, 'jobs/job_list.html', {
+        'jobs': page.items,
+        'page': page,
+        'recipe_id': _recipe_filter(request),
+        'status_choices': Job.STATUS_CHOICES,
+    })
+
+
+# Job CSV export: (header, field) pairs. SKU and code come from the job's own
+# snapshot, which outlives the recipe (Job.recipe is SET_NULL on delete).
+JOB_EXPORT_COLUMNS = [
+    ('JC#', 'job_name'),
+    ('SKU', 'sku'),
+    ('SKU Code', 'sku_code'),
+    ('Material Type', 'material_type'),
+    ('Application Type', 'application_type'),
+    ('UPS', 'ups'),
+    ('Purchase UPS', 'purchase_ups'),
+    ('PO Number', 'po_number'),
+    ('PO Quantity', 'po_quantity'),
+    ('PO Date', 'po_date'),
+    ('Unit Cost', 'unit_cost'),
+    ('Stock', 'stock'),
+    ('Wastage', 'wastage'),
+    ('Customer', 'customer_name'),
+    ('Planned Date', 'planned_date'),
+    ('Status', 'status'),
+]
+
+
+def job_export(request):
+    """Stream the job list (or one SKU's jobs with ?recipe=<pk>) as CSV in a single query."""
+    fields = [field for _, field in JOB_EXPORT_COLUMNS]
+    rows = _filter_jobs(request).order_by('pk').values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_csv([header for header, _ in JOB_EXPORT_COLUMNS], rows, 'jobs.csv')
+
+
+def _selected_job_ids(request):
+    """The posted job ids that can be primary keys; tampered values are skipped."""
+    low, high = connection.ops.integer_field_range(Job._meta.pk.get_internal_type())
+    ids = [int(pk) for pk in request.POST.getlist('selected_jobs') if pk.isdecimal()]
+    return [pk for pk in ids if low <= pk <= high]
+
+
+@require_POST
+def job_bulk_status(request):
+    """Move the selected jobs to one status with a single UPDATE."""
+    selected_ids = _selected_job_ids(request)
+    status = request.POST.get('status')
+    if selected_ids and status in dict(Job.STATUS_CHOICES):
+        user = request.user if request.user.is_authenticated else None
+        changed = bulk_change_status(selected_ids, status, user=user)
+        messages.success(request, f"{changed} jobs moved to {dict(Job.STATUS_CHOICES)[status]}.")
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('job-list')
+
+
+# Material requirements report
+MATERIAL_REPORT_COLUMNS = [
+    ('Period', 'period'),
+    ('Material', 'material_type'),
+    ('Print Sheet', 'print_sheet_size'),
+    ('Purchase Sheet', 'purchase_sheet_size'),
+    ('Jobs', 'jobs'),
+    ('Jobs Missing UPS', 'missing_ups'),
+    ('Quantity To Print', 'quantity_to_print'),
+    ('Print Sheets', 'print_sheets'),
+    ('Purchase Sheets', 'purchase_sheets'),
+]
+
+
+def _report_params(request):
+    """Date range (default: this month), window and statuses of the material report."""
+    today = timezone.localdate()
+    month_start = today.replace(day=1)
+    month_end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    start = parse_date(request.GET.get('start', '')) or month_start
+    end = parse_date(request.GET.get('end', '')) or month_end
+    window = request.GET.get('window', 'month')
+    if window not in WINDOWS:
+        window = 'month'
+    show_all = request.GET.get('status') == 'all'
+    statuses = [status for status, _ in Job.STATUS_CHOICES] if show_all else Job.OPEN_STATUSES
+    return {'start': start, 'end': end, 'window': window, 'statuses': statuses, 'show_all': show_all}
+
+
+def material_requirements(request):
+    """Purchase and print sheets needed per material and sheet size, for the chosen window."""
+    params = _report_params(request)
+    rows = material_report(params['start'], params['end'], params['statuses'], params['window'])
+    totals = {field: sum(row[field] for row in rows) for field in SUM_FIELDS}
+    return render(request, 'jobs/material_requirements.html', {
+        'rows': rows, 'totals': totals, 'windows': list(WINDOWS), **params,
+    })
+
+
+def material_requirements_export(request):
+    params = _report_params(request)
+    rows = material_report(params['start'], params['end'], params['statuses'], params['window'])
+    return stream_csv(
+        [header for header, _ in MATERIAL_REPORT_COLUMNS],
+        ([row.get(field, '') for _, field in MATERIAL_REPORT_COLUMNS] for row in rows),
+        'material_requirements.csv',
+    )
+
+
+# Production schedule
+# Jobs listed per machine on the HTML page; the JSON has the full queues
+SCHEDULE_PAGE_ROWS = 200
+
+
+def _schedule_start(request):
+    return parse_date(request.GET.get('start', '')) or timezone.localdate()
+
+
+def production_schedule(request):
+    schedule = schedule_open_jobs(_schedule_start(request))
+    queues = [
+        {**row, 'queue': schedule.queues[row['machine']][:SCHEDULE_PAGE_ROWS]}
+        for row in schedule.summary()
+    ]
+    return render(request, 'jobs/production_schedule.html', {
+        'schedule': schedule,
+        'queues': queues,
+        'unscheduled': schedule.unscheduled[:SCHEDULE_PAGE_ROWS],
+        'page_rows': SCHEDULE_PAGE_ROWS,
+    })
+
+
+def production_schedule_json(request):
+    """The schedule as JSON; ?machine=<name> limits it to one machine's queue."""
+    data = schedule_open_jobs(_schedule_start(request)).as_dict()
+    machine = request.GET.get('machine')
+    if machine:
+        data['machines'] = [row for row in data['machines'] if row['machine'] == machine]
+    return JsonResponse(data)
 
 
 def job_create(request):
@@ -29,63 +201,165 @@ def job_create(request):
         if form.is_valid():
             # Get SKU based on SKU field
             sku_value = form.cleaned_data.get('sku')
-            try:
-                # Fetch the SKURecipe instance based on the SKU
-                sku_recipe = SKURecipe.objects.get(sku_name=sku_value)
-                # Populate the sku_code field with the fetched recipe's sku_code
-                form.instance.sku_code = sku_recipe.sku_code
-                form.instance.material_type = sku_recipe.material_type
-                form.instance.application_type = sku_recipe.application_type
-                form.instance.one_up_width = sku_recipe.one_up_width
-                form.instance.one_up_height = sku_recipe.one_up_height
-                form.instance.print_sheet_width = sku_recipe.print_sheet_width
-                form.instance.print_sheet_height = sku_recipe.print_sheet_height
-                form.instance.print_sheet_size = sku_recipe.print_sheet_size
-                form.instance.ups = sku_recipe.ups
-                form.instance.purchase_sheet_width = sku_recipe.purchase_sheet_width
-                form.instance.purchase_sheet_height = sku_recipe.purchase_sheet_height
-                form.instance.purchase_sheet_size = sku_recipe.purchase_sheet_size
-                form.instance.purchase_ups = sku_recipe.purchase_ups
-            except SKURecipe.DoesNotExist:
+            # Fetch the recipe once; Job.save reuses the cached copy
+            sku_recipe = get_recipe(sku_value)
+            if sku_recipe is None:
                 form.add_error('sku', 'SKU does not exist.')
                 return render(request, 'jobs/job_create.html', {'form': form})
+            form.instance.apply_recipe(sku_recipe)
 
-            # Save the job after ensuring all fields are populated
-            form.save()
+            # Save the job after ensuring all fields are populated (one short write transaction)
+            write_transaction(form.save)
             return redirect('job-list')  # Redirect to the job list after successful creation
     else:
         form = JobForm()
     
     return render(request, 'jobs/job_create.html', {'form': form})
 
-def fetch_recipe(request):
+# Bulk job import
+def job_import(request):
+    # The importer reads uploads with pandas; import it only when one arrives
+    from .importer import MissingColumnsError, import_dataframe, read_upload
+
+    if request.method == 'POST':
+        form = JobImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                df = read_upload(request.FILES['file'])
+                user = request.user if request.user.is_authenticated else None
+                created = import_dataframe(df, user=user)
+            except (MissingColumnsError, ValueError) as e:
+                messages.error(request, str(e))
+                return redirect('job-import')
+            except Exception as e:
+                messages.error(request, f"Error processing file: {str(e)}")
+                return redirect('job-import')
+
+            # If any errors → return the failing rows
+            failed = df[df['Error'] != '']
+            if not failed.empty:
+                report = ErrorReport(form.cleaned_data['report_format'])
+                report.add_frame(failed)
+                return report.response('job_import_errors')
+
+            messages.success(request, f"{created} jobs imported successfully!")
+            return redirect('job-import')
+    else:
+        form = JobImportForm()
+    return render(request, 'jobs/job_import.html', {'form': form})
+
+
+def job_import_sample(request):
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="sample_jobs.csv"'
+    writer = csv.writer(response)
+    writer.writerow(['sku', 'po_number', 'po_quantity', 'po_date', 'unit_cost', 'planned_date',
+                     'customer_name', 'notes', 'stock', 'wastage'])
+    writer.writerow(['Clothing Tag', 'PO-1001', 5000, '2025-09-01', 2.5, '2025-09-10',
+                     'ABC Apparel', '', 0, 100])
+    return response
+
+
+# The JSON lookups below are async: under ASGI they run on the event loop
+# instead of holding a worker thread (see README, "Running under ASGI").
+async def fetch_recipe(request):
     sku = request.GET.get('sku', None)
     if not sku:
         return JsonResponse({'error': 'No SKU provided'}, status=400)
 
-    try:
-        # Fetch the SKURecipe instance based on the SKU
-        recipe = SKURecipe.objects.get(sku_name=sku)
-        # Prepare the data to be returned as a JSON response
-        data = {
-            'sku_code': recipe.sku_code,
-            'material_type': recipe.material_type,
-            'application_type': recipe.application_type,
-            'one_up_width': str(recipe.one_up_width),
-            'one_up_height': str(recipe.one_up_height),
-            'print_sheet_width': str(recipe.print_sheet_width),
-            'print_sheet_height': str(recipe.print_sheet_height),
-            'print_sheet_size': recipe.print_sheet_size,
-            'ups': recipe.ups,
-            'purchase_sheet_width': str(recipe.purchase_sheet_width),
-            'purchase_sheet_height': str(recipe.purchase_sheet_height),
-            'purchase_sheet_size': recipe.purchase_sheet_size,
-            'purchase_ups': recipe.purchase_ups,
-        }
-        return JsonResponse(data)
-    except SKURecipe.DoesNotExist:
+    # Hot SKUs are served from the per-process recipe cache
+    recipe = await aget_recipe(sku)
+    if recipe is None:
         return JsonResponse({'error': 'SKU not found'}, status=404)
-    
+
+    etag = f'"{_recipe_stamp(recipe)}"'
+    last_modified = recipe['updated_at']
+    return _conditional_json(request, etag, last_modified, lambda: _recipe_payload(recipe))
+
+
+# Most SKUs one batch request may ask for (keeps the IN list under SQLite's variable limit)
+BATCH_FETCH_LIMIT = 400
+
+
+async def fetch_recipes(request):
+    """
+    Batch form of fetch_recipe: ?sku=<name>&code=<sku_code>, each repeatable,
+    answered from one IN query. Results are keyed by the requested name/code.
+    """
+    names = [name for name in dict.fromkeys(request.GET.getlist('sku')) if name]
+    codes = [code for code in dict.fromkeys(request.GET.getlist('code')) if code]
+    if not names and not codes:
+        return JsonResponse({'error': 'No SKU provided'}, status=400)
+    if len(names) + len(codes) > BATCH_FETCH_LIMIT:
+        return JsonResponse({'error': f'At most {BATCH_FETCH_LIMIT} SKUs per request'}, status=400)
+
+    recipes = [
+        recipe async for recipe in
+        SKURecipe.objects.filter(Q(sku_name__in=names) | Q(sku_code__in=codes)).values(*RECIPE_FIELDS)
+    ]
+    by_name = {recipe['sku_name']: recipe for recipe in recipes}
+    by_code = {recipe['sku_code']: recipe for recipe in recipes}
+
+    # The ETag covers what was asked for and the stamp of everything found,
+    # so it changes when any of those recipes is edited, created or deleted.
+    # No Last-Modified: the newest updated_at does not move when a recipe is
+    # deleted, so If-Modified-Since would answer 304 with a stale batch.
+    stamps = sorted(_recipe_stamp(recipe) for recipe in recipes)
+    digest = hashlib.md5("|".join([*names, "", *codes, "", *stamps]).encode()).hexdigest()
+    etag = f'"{digest}"'
+
+    def payload():
+        return {
+            'skus': {name: _recipe_payload(by_name[name]) for name in names if name in by_name},
+            'codes': {code: _recipe_payload(by_code[code]) for code in codes if code in by_code},
+            'missing': [name for name in names if name not in by_name]
+                       + [code for code in codes if code not in by_code],
+        }
+
+    return _conditional_json(request, etag, None, payload)
+
+
+def _recipe_stamp(recipe):
+    return f"{recipe['id']}-{recipe['updated_at'].timestamp():.6f}"
+
+
+def _conditional_json(request, etag, last_modified, payload):
+    """
+    Answer with 304 when the client already holds ``etag`` (or, given a
+    ``last_modified``, nothing changed since If-Modified-Since); otherwise
+    build ``payload()`` and send it.
+    Clients must revalidate each time, which costs no serialization.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = JsonResponse(payload())
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _recipe_payload(recipe):
+    return {
+        'sku_code': recipe['sku_code'],
+        'sku_name': recipe['sku_name'],
+        'material_type': recipe['material_type'],
+        'application_type': recipe['application_type'],
+        'one_up_width': str(recipe['one_up_width']),
+        'one_up_height': str(recipe['one_up_height']),
+        'print_sheet_width': str(recipe['print_sheet_width']),
+        'print_sheet_height': str(recipe['print_sheet_height']),
+        'print_sheet_size': recipe['print_sheet_size'],
+        'ups': recipe['ups'],
+        'purchase_sheet_width': str(recipe['purchase_sheet_width']),
+        'purchase_sheet_height': str(recipe['purchase_sheet_height']),
+        'purchase_sheet_size': recipe['purchase_sheet_size'],
+        'purchase_ups': recipe['purchase_ups'],
+        'updated_at': recipe['updated_at'].isoformat(),
+    }
+
 
 def job_edit(request, pk):
     job = get_object_or_404(Job, pk=pk)  # Get the job by its primary key (ID)
@@ -93,28 +367,14 @@ def job_edit(request, pk):
         form = JobForm(request.POST, instance=job)  # Prepopulate the form with existing job data
         if form.is_valid():
             sku_value = form.cleaned_data.get('sku')
-            try:
-                # Fetch the SKURecipe instance based on the SKU
-                sku_recipe = SKURecipe.objects.get(sku_name=sku_value)
-                # Populate the sku_code and related fields with the fetched recipe's data
-                job.sku_code = sku_recipe.sku_code
-                job.material_type = sku_recipe.material_type
-                job.application_type = sku_recipe.application_type
-                job.one_up_width = sku_recipe.one_up_width
-                job.one_up_height = sku_recipe.one_up_height
-                job.print_sheet_width = sku_recipe.print_sheet_width
-                job.print_sheet_height = sku_recipe.print_sheet_height
-                job.print_sheet_size = sku_recipe.print_sheet_size
-                job.ups = sku_recipe.ups
-                job.purchase_sheet_width = sku_recipe.purchase_sheet_width
-                job.purchase_sheet_height = sku_recipe.purchase_sheet_height
-                job.purchase_sheet_size = sku_recipe.purchase_sheet_size
-                job.purchase_ups = sku_recipe.purchase_ups
-            except SKURecipe.DoesNotExist:
+            # Fetch the recipe once; Job.save reuses the cached copy
+            sku_recipe = get_recipe(sku_value)
+            if sku_recipe is None:
                 form.add_error('sku', 'SKU does not exist.')
                 return render(request, 'jobs/job_edit.html', {'form': form, 'job': job})
+            job.apply_recipe(sku_recipe)
 
-            form.save()  # Save the updated job data
+            write_transaction(form.save)  # Save the updated job data
             return redirect('job-list')  # Redirect to the job list after successful update
     else:
         form = JobForm(instance=job)  # Prepopulate the form with the existing job data
@@ -123,25 +383,19 @@ def job_edit(request, pk):
 
 def job_delete(request, pk):
     job = get_object_or_404(Job, pk=pk)
-    job.delete()  # Delete the job
+    write_transaction(job.delete)  # Delete the job
     return redirect('job-list')  # Redirect to the job list after successful deletion
 
 
 
-def get_last_job_code(request):
-    # Extract the month-year from the request
-    month_year = request.GET.get('month_year', '')
-    
-    # Fetch the last job created in this month-year
-    try:
-        last_job = Job.objects.filter(job_name__contains=month_year).last()
-        
-        if last_job:
-            last_job_code = last_job.job_name  # This is the last JC# for the month-year
-        else:
-            last_job_code = None
-        
-        return JsonResponse({'last_job_code': last_job_code})
-
-    except Job.DoesNotExist:
-        return JsonResponse({'error': 'No jobs found for this month'}, status=404)
\ No newline at end of file
+async def get_last_job_code(request):
+    # month_year is "<month>-<year>" (e.g. "9-2025"); defaults to the current month
+    month_year = request.GET.get('month_year', '') or job_month_year()
+
+    # Read the per-month JC# sequence (a primary-key lookup) instead of scanning jobs.
+    # The real JC# is assigned when the job is saved; next_job_code is a preview.
+    last_number = await Job.alast_job_number(month_year)
+    return JsonResponse({
+        'last_job_code': format_job_name(month_year, last_number) if last_number else None,
+        'next_job_code': format_job_name(month_year, last_number + 1),
+    })
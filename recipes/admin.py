@@ -1,8 +1,14 @@
 from django.contrib import admin
-from .models import SKURecipe
+from .models import ImportTask, SKURecipe
 
 @admin.register(SKURecipe)
 class SKURecipeAdmin(admin.ModelAdmin):
     list_display = ("sku_code", "sku_name", "material_type", "application_type", "ups", "purchase_ups", "created_at")
     search_fields = ("sku_code", "sku_name", "material_type", "application_type")
     list_filter = ("material_type", "application_type")
+
+
+@admin.register(ImportTask)
+class ImportTaskAdmin(admin.ModelAdmin):
+    list_display = ("original_name", "status", "rows_processed", "rows_created", "rows_failed", "created_at", "finished_at")
+    list_filter = ("status",)
@@ -0,0 +1,41 @@
+"""Read-only API for the SKU catalog (routed under /api/skus/, see core.api)."""
+import django_filters
+from django.db.models import Q
+from rest_framework import serializers
+
+from core.api import ReadOnlyAPIViewSet, SparseFieldsMixin
+
+from .models import SKURecipe
+
+
+class SKURecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = SKURecipe
+        fields = [
+            "id", "sku_code", "sku_name",
+            "material_type", "application_type",
+            "one_up_width", "one_up_height",
+            "print_sheet_width", "print_sheet_height", "print_sheet_size", "ups",
+            "purchase_sheet_width", "purchase_sheet_height", "purchase_sheet_size", "purchase_ups",
+            "created_at", "updated_at",
+        ]
+
+
+class SKURecipeFilter(django_filters.FilterSet):
+    sku = django_filters.CharFilter(method="filter_sku", label="SKU name or code")
+    material = django_filters.CharFilter(field_name="material_type", lookup_expr="iexact")
+    application = django_filters.CharFilter(field_name="application_type", lookup_expr="iexact")
+    updated_since = django_filters.IsoDateTimeFilter(field_name="updated_at", lookup_expr="gte")
+
+    class Meta:
+        model = SKURecipe
+        fields = ["sku", "material", "application", "updated_since"]
+
+    def filter_sku(self, queryset, name, value):
+        return queryset.filter(Q(sku_name=value) | Q(sku_code=value))
+
+
+class SKURecipeViewSet(ReadOnlyAPIViewSet):
+    queryset = SKURecipe.objects.all()
+    serializer_class = SKURecipeSerializer
+    filterset_class = SKURecipeFilter
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(_restore_search_index, sender=self)
+
+
+def _restore_search_index(sender, using, **kwargs):
+    # Rebuilding a table during a migration drops its FTS triggers
+    from django.db import connections
+    from .search import install_search_index
+    install_search_index(connections[using])
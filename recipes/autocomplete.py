@@ -0,0 +1,171 @@
+"""
+Prefix index behind the SKU typeahead.
+
+Names and codes are kept in two sorted lists of (lower-cased key, row) per
+process and searched with bisect, so a keystroke never touches the database.
+When the recipe cache version changes (see recipe_cache) the index is brought
+up to date from the rows whose updated_at moved since it was last seen and
+the changes are merged into copies of the sorted lists; a full reload only
+happens on first use, when the row count shows SKUs were deleted, or every
+FULL_RELOAD_AFTER seconds. ``asuggest`` is the async variant; it refreshes on
+the sync thread through sync_to_async, once for all the requests waiting on
+the new version.
+"""
+import bisect
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+
+from core.singleflight import shared
+
+from .models import SKURecipe
+from .recipe_cache import acurrent_version, current_version
+
+
+MAX_SUGGESTIONS = 50
+# Also picks up an edit committed after a newer one was already merged
+FULL_RELOAD_AFTER = 300
+
+_lock = threading.Lock()
+_index = None
+
+
+def _rows():
+    return SKURecipe.objects.order_by().values_list(
+        "id", "sku_code", "sku_name", "material_type", "updated_at"
+    )
+
+
+def _merged(entries, gone, added, column):
+    entries = list(entries)
+    for row in gone:
+        del entries[bisect.bisect_left(entries, (row[column].lower(), row))]
+    # Timsort merges the sorted list and the new tail in linear time
+    entries.extend((row[column].lower(), row) for row in added)
+    entries.sort()
+    return entries
+
+
+class _Index:
+    """One immutable snapshot of the catalog; refreshes build a new one."""
+
+    __slots__ = ("version", "rows", "names", "codes", "seen_until", "loaded_at")
+
+    def __init__(self, version, rows, names, codes, seen_until, loaded_at):
+        self.version = version
+        self.rows = rows  # id -> (sku_code, sku_name, material_type)
+        self.names = names
+        self.codes = codes
+        self.seen_until = seen_until
+        self.loaded_at = loaded_at
+
+    @classmethod
+    def load(cls, version):
+        rows = {}
+        seen_until = None
+        for pk, code, name, material, updated_at in _rows():
+            rows[pk] = (code, name, material)
+            seen_until = updated_at if seen_until is None else max(seen_until, updated_at)
+        return cls(
+            version, rows,
+            sorted((row[1].lower(), row) for row in rows.values()),
+            sorted((row[0].lower(), row) for row in rows.values()),
+            seen_until, time.monotonic(),
+        )
+
+    def refreshed(self, version):
+        if self.seen_until is None or time.monotonic() - self.loaded_at > FULL_RELOAD_AFTER:
+            return _Index.load(version)
+        rows = dict(self.rows)
+        gone, added = [], []
+        seen_until = self.seen_until
+        for pk, code, name, material, updated_at in _rows().filter(updated_at__gte=self.seen_until):
+            seen_until = max(seen_until, updated_at)
+            row = (code, name, material)
+            old = rows.get(pk)
+            if old == row:
+                continue
+            if old is not None:
+                gone.append(old)
+            rows[pk] = row
+            added.append(row)
+        if len(rows) != SKURecipe.objects.count():
+            return _Index.load(version)  # SKUs were deleted
+        if not added:
+            return _Index(version, self.rows, self.names, self.codes, seen_until, self.loaded_at)
+        return _Index(
+            version, rows,
+            _merged(self.names, gone, added, 1),
+            _merged(self.codes, gone, added, 0),
+            seen_until, self.loaded_at,
+        )
+
+
+def get_index(version=None):
+    global _index
+    version = version or current_version()
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            # Another thread may have refreshed it while we waited
+            if _index is None:
+                _index = _Index.load(version)
+            elif _index.version != version:
+                _index = _index.refreshed(version)
+            index = _index
+    return index
+
+
+async def aget_index(version=None):
+    version = version or await acurrent_version()
+    index = _index
+    if index is None or index.version != version:
+        index = await shared(("sku-index", version), lambda: sync_to_async(get_index)(version))
+    return index
+
+
+def _prefix_matches(entries, prefix, limit):
+    start = bisect.bisect_left(entries, (prefix,))
+    matches = []
+    for key, row in entries[start:start + limit]:
+        if not key.startswith(prefix):
+            break
+        matches.append(row)
+    return matches
+
+
+def _normalize(prefix, limit):
+    return prefix.strip().lower(), max(1, min(limit, MAX_SUGGESTIONS))
+
+
+def _suggest(index, prefix, limit):
+    matches = _prefix_matches(index.names, prefix, limit)
+    if len(matches) < limit:
+        seen = {row[0] for row in matches}
+        for row in _prefix_matches(index.codes, prefix, limit):
+            if row[0] not in seen and len(matches) < limit:
+                matches.append(row)
+    return [
+        {"sku_code": code, "sku_name": name, "material_type": material}
+        for code, name, material in matches
+    ]
+
+
+def suggest(prefix, limit=10, version=None):
+    """
+    Up to ``limit`` SKUs whose name (then code) starts with ``prefix``,
+    as dicts of sku_code, sku_name and material_type.
+    """
+    prefix, limit = _normalize(prefix, limit)
+    if not prefix:
+        return []
+    return _suggest(get_index(version), prefix, limit)
+
+
+async def asuggest(prefix, limit=10, version=None):
+    """Async suggest."""
+    prefix, limit = _normalize(prefix, limit)
+    if not prefix:
+        return []
+    return _suggest(await aget_index(version), prefix, limit)
@@ -1,4 +1,5 @@
 from django import forms
+from core.reports import FORMAT_CHOICES, XLSX
 from .models import SKURecipe
 
 class SKURecipeForm(forms.ModelForm):
@@ -28,9 +29,44 @@ class SKURecipeForm(forms.ModelForm):
             'purchase_ups': forms.NumberInput(attrs={'class': 'form-control'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Left blank, ups are calculated from the dimensions (see recipes.imposition)
+        for field in ('ups', 'purchase_ups'):
+            self.fields[field].required = False
+            self.fields[field].help_text = "Leave blank to calculate from the sizes"
+        self.imposition_notes = []
+
+    def clean(self):
+        from .imposition import impose  # NumPy; loaded with the first form submitted
+
+        cleaned_data = super().clean()
+        computed = dict(zip(('ups', 'purchase_ups'), impose(
+            cleaned_data.get('one_up_width'), cleaned_data.get('one_up_height'),
+            cleaned_data.get('print_sheet_width'), cleaned_data.get('print_sheet_height'),
+            cleaned_data.get('purchase_sheet_width'), cleaned_data.get('purchase_sheet_height'),
+        )))
+        for field, value in computed.items():
+            if field in self.errors:
+                continue
+            entered = cleaned_data.get(field)
+            if entered is None:
+                if value is None:
+                    self.add_error(field, "Enter a value, or the sheet sizes so it can be calculated.")
+                else:
+                    cleaned_data[field] = value
+            elif value is not None and entered != value:
+                label = self.fields[field].label
+                self.imposition_notes.append(f"{label} is {entered} but the sizes give {value}.")
+        return cleaned_data
+
 
 class BulkUploadForm(forms.Form):
     file = forms.FileField(
         label="Upload CSV or Excel file",
         help_text="Only .csv or .xlsx files are supported"
     )
+    report_format = forms.ChoiceField(
+        choices=FORMAT_CHOICES, initial=XLSX, label="Error report format",
+        help_text="Rows that fail are sent back in this format, with their row number and error",
+    )
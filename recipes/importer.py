@@ -0,0 +1,428 @@
+"""
+Set-based SKU import engine used by the bulk upload view.
+
+Rows are validated column by column, duplicates are checked against one
+prefetched set of existing names, and valid rows are written with
+``bulk_create`` in short transactions of BULK_CREATE_BATCH_SIZE rows (see
+core.db.WriteCoalescer), so other writers are not locked out for the whole
+file.
+
+Uploads go through ``import_stream``, which reads the file in fixed-size
+chunks and commits one chunk at a time so memory stays flat. CSV is read with
+the stdlib csv module and .xlsx with openpyxl's read-only iterator, so pandas
+is only loaded for legacy .xls files; ``import_dataframe`` is the same engine
+for rows that are already in a DataFrame.
+"""
+import csv
+import io
+import re
+
+from django.db import IntegrityError, transaction
+
+from core.db import WriteCoalescer, execute_insert, prepare_insert
+from core.parsing import MissingColumnsError, is_blank, parse_count, parse_decimal
+from core.stats import adjust
+
+from .models import SKU_TOTAL_STAT, SKURecipe
+from .recipe_cache import schedule_version_bump
+
+
+REQUIRED_COLUMNS = [
+    "sku_name", "material_type", "application_type",
+    "one_up_width", "one_up_height",
+    "ups", "purchase_ups",
+]
+
+# Rows per INSERT statement and names per IN (...) lookup. Both stay well
+# under SQLite's bound-parameter limit.
+BULK_CREATE_BATCH_SIZE = 500
+NAME_LOOKUP_CHUNK_SIZE = 900
+
+# Rows validated and committed per chunk in streaming mode
+STREAM_CHUNK_SIZE = 5000
+
+# Cell texts read as blank, as pandas' read_csv/read_excel did before the
+# readers moved to the csv module and openpyxl
+NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+
+class Chunk:
+    """
+    A block of uploaded rows: the header ``columns``, the cell ``rows`` (tuples
+    as wide as the header, None for blank cells) and ``index``, each row's
+    position under the header row. import_chunk fills in ``errors``.
+    """
+
+    def __init__(self, columns, rows, index):
+        self.columns = columns
+        self.rows = rows
+        self.index = index
+        self.errors = [""] * len(rows)
+
+    @classmethod
+    def from_frame(cls, df):
+        rows = [tuple(None if is_blank(v) else v for v in row) for row in df.itertuples(index=False, name=None)]
+        return cls([str(c) for c in df.columns], rows, list(df.index))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, name):
+        """The values of column ``name`` as a list, or a list of None if it is absent."""
+        if name not in self.columns:
+            return [None] * len(self.rows)
+        position = self.columns.index(name)
+        return [row[position] for row in self.rows]
+
+    def failed(self):
+        """(row number in the file, error, cells) of every row that was not imported."""
+        return [
+            (label + 2, error, row)  # the header is row 1
+            for label, error, row in zip(self.index, self.errors, self.rows) if error
+        ]
+
+
+# ------------------------
+# Field parsers
+# ------------------------
+def _parse_decimal(value, field_name="value"):
+    """Try to parse a value into Decimal. Reject WxH strings."""
+    # Prevent WxH strings being passed here
+    if not is_blank(value) and any(x in str(value).lower() for x in ["x", "×", "*"]):
+        raise ValueError(f"Invalid {field_name}: '{value}' looks like WxH, expected a number only")
+    return parse_decimal(value, field_name)
+
+
+def _parse_sheet_fields(width, height, size, field_name="sheet"):
+    """
+    Decide whether to store as width/height or size string.
+    Allows formats like '12.5x11' or '12.5*11' in either width/height or size column.
+    """
+    # Case 1: If size string is provided
+    if not is_blank(size):
+        val = str(size).replace("×", "x").replace("*", "x").strip()
+        if "x" in val.lower():
+            parts = re.split(r"[x]", val)
+            if len(parts) == 2:
+                return _parse_decimal(parts[0], f"{field_name}_width"), _parse_decimal(parts[1], f"{field_name}_height"), None
+            return None, None, val  # fallback: keep as string
+        else:
+            return _parse_decimal(val, f"{field_name}_size"), None, None
+
+    # Case 2: Width/Height provided separately
+    if isinstance(width, str) and any(x in width for x in ["x", "×", "*"]):
+        parts = re.split(r"[x*×]", width)
+        if len(parts) == 2:
+            return _parse_decimal(parts[0], f"{field_name}_width"), _parse_decimal(parts[1], f"{field_name}_height"), None
+
+    if isinstance(height, str) and any(x in height for x in ["x", "×", "*"]):
+        parts = re.split(r"[x*×]", height)
+        if len(parts) == 2:
+            return _parse_decimal(parts[0], f"{field_name}_width"), _parse_decimal(parts[1], f"{field_name}_height"), None
+
+    # Normal case
+    w = _parse_decimal(width, f"{field_name}_width")
+    h = _parse_decimal(height, f"{field_name}_height")
+    return w, h, None
+
+
+def _parse_count(value, field_name="ups"):
+    """Parse an ups column value; blanks give None (calculated from the sizes later)."""
+    return parse_count(value, field_name, SKURecipe)
+
+
+# ------------------------
+# Column helpers
+# ------------------------
+def _parse_column(parser, *columns):
+    """
+    Run ``parser`` over whole columns at once.
+    Returns (values, errors) where errors[i] is None for rows that parsed.
+    """
+    values, errors = [], []
+    for cells in zip(*columns):
+        try:
+            values.append(parser(*cells))
+            errors.append(None)
+        except (ValueError, TypeError, ArithmeticError) as e:
+            values.append(None)
+            errors.append(str(e))
+    return values, errors
+
+
+def _existing_names(names):
+    """Fetch the subset of ``names`` already in the catalog, chunking the IN lookup."""
+    names = list({n for n in names if n is not None})
+    existing = set()
+    for start in range(0, len(names), NAME_LOOKUP_CHUNK_SIZE):
+        chunk = names[start:start + NAME_LOOKUP_CHUNK_SIZE]
+        existing.update(
+            SKURecipe.objects.filter(sku_name__in=chunk).values_list("sku_name", flat=True)
+        )
+    return existing
+
+
+def missing_columns(columns):
+    """Return the required columns that are not present in ``columns``."""
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+
+# ------------------------
+# Import
+# ------------------------
+def import_chunk(chunk):
+    """
+    Validate and insert every row of ``chunk``.
+
+    Fills ``chunk.errors`` with the per-row report (empty for rows that were
+    created) and returns the number of SKUs created.
+    """
+    if not len(chunk):
+        return 0
+
+    names = chunk.column("sku_name")
+
+    # Parse every column in one pass each
+    one_up_w, one_up_w_err = _parse_column(lambda v: _parse_decimal(v, "one_up_width"), chunk.column("one_up_width"))
+    one_up_h, one_up_h_err = _parse_column(lambda v: _parse_decimal(v, "one_up_height"), chunk.column("one_up_height"))
+    print_sheet, print_err = _parse_column(
+        lambda w, h, s: _parse_sheet_fields(w, h, s, field_name="print_sheet"),
+        chunk.column("print_sheet_width"), chunk.column("print_sheet_height"), chunk.column("print_sheet_size"),
+    )
+    purchase_sheet, purchase_err = _parse_column(
+        lambda w, h, s: _parse_sheet_fields(w, h, s, field_name="purchase_sheet"),
+        chunk.column("purchase_sheet_width"), chunk.column("purchase_sheet_height"), chunk.column("purchase_sheet_size"),
+    )
+    ups, ups_err = _parse_column(lambda v: _parse_count(v, "ups"), chunk.column("ups"))
+    purchase_ups, purchase_ups_err = _parse_column(lambda v: _parse_count(v, "purchase_ups"), chunk.column("purchase_ups"))
+
+    # Blank ups are calculated from the sizes, for the whole file at once
+    ups, purchase_ups = _fill_blank_ups(one_up_w, one_up_h, print_sheet, purchase_sheet, ups, purchase_ups)
+
+    existing = _existing_names(names)
+    errors = chunk.errors
+    claimed = set()  # names taken by earlier valid rows of this file
+    valid_rows = []
+
+    for i, name in enumerate(names):
+        # A name already in the catalog, or claimed by an earlier valid row
+        # of this file, is a duplicate regardless of its other fields.
+        if name is None:
+            errors[i] = "sku_name is required"
+            continue
+        if name in existing or name in claimed:
+            errors[i] = "SKU name already exists"
+            continue
+
+        row_errors = [e for e in (one_up_w_err[i], one_up_h_err[i], print_err[i], purchase_err[i]) if e]
+        if row_errors:
+            errors[i] = ", ".join(row_errors)
+            continue
+
+        count_error = ups_err[i] or purchase_ups_err[i]
+        if count_error:
+            errors[i] = count_error
+            continue
+
+        claimed.add(name)
+        valid_rows.append(i)
+
+    # Build instances for the valid rows, numbering codes in file order
+    codes = SKURecipe.allocate_codes(len(valid_rows)) if valid_rows else []
+    material_types = chunk.column("material_type")
+    application_types = chunk.column("application_type")
+    objs = []
+    for i, sku_code in zip(valid_rows, codes):
+        print_w, print_h, print_size = print_sheet[i]
+        purchase_w, purchase_h, purchase_size = purchase_sheet[i]
+        objs.append((i, SKURecipe(
+            sku_code=sku_code,
+            sku_name=names[i],
+            material_type=material_types[i],
+            application_type=application_types[i],
+            one_up_width=one_up_w[i],
+            one_up_height=one_up_h[i],
+            ups=ups[i],
+            print_sheet_width=print_w,
+            print_sheet_height=print_h,
+            print_sheet_size=print_size,
+            purchase_sheet_width=purchase_w,
+            purchase_sheet_height=purchase_h,
+            purchase_sheet_size=purchase_size,
+            purchase_ups=purchase_ups[i],
+        )))
+
+    return _write_rows(objs, errors)
+
+
+def import_dataframe(df):
+    """
+    import_chunk for rows already loaded into a DataFrame.
+
+    Adds an "Error" column holding the per-row report (empty for rows that
+    were created) and returns the number of SKUs created.
+    """
+    chunk = Chunk.from_frame(df)
+    created = import_chunk(chunk)
+    df["Error"] = [f"Row {label + 2}: {e}" if e else "" for label, e in zip(chunk.index, chunk.errors)]
+    return created
+
+
+def _fill_blank_ups(one_up_w, one_up_h, print_sheet, purchase_sheet, ups, purchase_ups):
+    """
+    Replace blank ups/purchase_ups with the values the sizes give (see
+    recipes.imposition); blanks that cannot be calculated become 0.
+    """
+    if all(v is not None for v in ups) and all(v is not None for v in purchase_ups):
+        return ups, purchase_ups
+    from .imposition import compute_purchase_ups, compute_ups  # NumPy, only needed here
+
+    print_w = [sheet[0] if sheet else None for sheet in print_sheet]
+    print_h = [sheet[1] if sheet else None for sheet in print_sheet]
+    computed_ups = compute_ups(one_up_w, one_up_h, print_w, print_h)
+    computed_purchase = compute_purchase_ups(
+        print_w, print_h,
+        [sheet[0] if sheet else None for sheet in purchase_sheet],
+        [sheet[1] if sheet else None for sheet in purchase_sheet],
+    )
+    return (
+        [v if v is not None else max(int(c), 0) for v, c in zip(ups, computed_ups)],
+        [v if v is not None else max(int(c), 0) for v, c in zip(purchase_ups, computed_purchase)],
+    )
+
+
+def _write_rows(objs, errors):
+    """
+    Insert ``(position, instance)`` pairs, one transaction per batch. A batch
+    rejected by the database is retried row by row so only the offending
+    rows are reported.
+    """
+    def prepare(batch):
+        return batch, prepare_insert(SKURecipe, [obj for _, obj in batch])
+
+    def write(prepared):
+        batch, insert = prepared
+        try:
+            with transaction.atomic():
+                execute_insert(insert)
+        except IntegrityError:
+            created = 0
+            for i, obj in batch:
+                try:
+                    with transaction.atomic():
+                        obj.save()
+                    created += 1
+                except Exception as e:
+                    errors[i] = f"Unexpected error → {str(e)}"
+            return created
+        # Raw inserts send no post_save signals
+        schedule_version_bump()
+        adjust({SKU_TOTAL_STAT: len(batch)})
+        return len(batch)
+
+    with WriteCoalescer(write, prepare, max_rows=BULK_CREATE_BATCH_SIZE) as writer:
+        writer.extend(objs)
+    return writer.written
+
+
+# ------------------------
+# Streaming import
+# ------------------------
+def _blank_cell(cell):
+    return is_blank(cell) or (isinstance(cell, str) and cell.strip() in NA_VALUES)
+
+
+def _chunks(header, rows, chunksize):
+    """
+    Group ``rows`` (cell sequences after the ``header`` row) into Chunks.
+    Rows are indexed by their position under the header, so blank rows that
+    are skipped still count towards the "Row N" numbers. Cells holding one
+    of the NA_VALUES are blank.
+    """
+    columns = ["" if c is None else str(c).strip() for c in header]
+    width = len(columns)
+    buffer, index = [], []
+    for position, row in enumerate(rows):
+        cells = tuple(None if _blank_cell(cell) else cell for cell in row[:width])
+        if all(cell is None for cell in cells):
+            continue
+        buffer.append(cells + (None,) * (width - len(cells)))
+        index.append(position)
+        if len(buffer) == chunksize:
+            yield Chunk(columns, buffer, index)
+            buffer, index = [], []
+    if buffer:
+        yield Chunk(columns, buffer, index)
+
+
+def iter_csv_chunks(file, chunksize=STREAM_CHUNK_SIZE):
+    """Yield Chunks of ``chunksize`` rows parsed with the stdlib csv reader (cells stay strings)."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        rows = csv.reader(text)
+        header = next(rows, None)
+        if header is not None:
+            yield from _chunks(header, rows, chunksize)
+    finally:
+        text.detach()  # leave the upload open for its owner
+
+
+def iter_xlsx_chunks(file, chunksize=STREAM_CHUNK_SIZE):
+    """Yield Chunks of ``chunksize`` rows read through openpyxl's read-only iterator."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is not None:
+            yield from _chunks(header, rows, chunksize)
+    finally:
+        workbook.close()
+
+
+def iter_chunks(file, file_ext, chunksize=STREAM_CHUNK_SIZE):
+    """Pick the chunk reader for an uploaded file's extension."""
+    if file_ext == "csv":
+        return iter_csv_chunks(file, chunksize)
+    if file_ext == "xlsx":
+        return iter_xlsx_chunks(file, chunksize)
+    # Legacy .xls has no streaming reader; load it whole with pandas and slice it.
+    import pandas as pd
+
+    df = pd.read_excel(file)
+    return (Chunk.from_frame(df.iloc[start:start + chunksize]) for start in range(0, len(df), chunksize))
+
+
+def import_stream(chunks, on_errors=None, on_progress=None):
+    """
+    Import an iterable of Chunks, committing each one before the next is
+    read. Duplicates across chunks are caught because earlier chunks are
+    already in the database when later ones are checked.
+
+    ``on_errors`` is called with ``(columns, chunk.failed())`` for each chunk
+    with failing rows, as soon as they are known (ErrorReport.add takes
+    exactly that), and ``on_progress`` with the running totals after every
+    chunk. Returns a dict with the totals.
+    """
+    totals = {"rows": 0, "created": 0, "failed": 0}
+    for number, chunk in enumerate(chunks):
+        if number == 0:
+            missing = missing_columns(chunk.columns)
+            if missing:
+                raise MissingColumnsError(missing)
+
+        totals["created"] += import_chunk(chunk)
+        totals["rows"] += len(chunk)
+
+        failed = chunk.failed()
+        if failed:
+            totals["failed"] += len(failed)
+            if on_errors:
+                on_errors(chunk.columns, failed)
+        if on_progress:
+            on_progress(totals)
+    return totals
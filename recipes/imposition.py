@@ -0,0 +1,138 @@
+"""
+Imposition: how many 1-ups fit on a print sheet (``ups``) and how many print
+sheets are cut from a purchase sheet (``purchase_ups``).
+
+Each piece is laid out as a regular grid, optionally turned 90°, with
+bleed around every piece, a gutter between pieces and a margin on the sheet.
+The functions take NumPy arrays so a whole catalog is checked in one pass.
+Missing or non-positive dimensions give -1 ("cannot be computed").
+``impose`` wraps them for a single SKU.
+"""
+import numpy as np
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+
+DEFAULTS = {
+    "BLEED_MM": 0,
+    "GUTTER_MM": 0,
+    "MARGIN_MM": 0,
+    "ALLOW_ROTATION": True,
+    "CUT_MARGIN_MM": 0,
+    "PURCHASE_SHEET_UNIT_MM": 25.4,
+}
+
+# Absorbs float noise so an exact fit (e.g. 10 x 50 mm in 500 mm) is not lost
+_EPSILON = 1e-9
+
+
+def options(**overrides):
+    """settings.IMPOSITION on top of DEFAULTS, with per-call ``overrides``."""
+    return {**DEFAULTS, **getattr(settings, "IMPOSITION", {}), **overrides}
+
+
+def _as_array(values):
+    """Float array with None/blank values as NaN."""
+    if isinstance(values, np.ndarray):
+        return values.astype(float, copy=False)
+    return np.array([np.nan if v is None or v == "" else v for v in values], dtype=float)
+
+
+def _grid(piece_w, piece_h, sheet_w, sheet_h, gutter):
+    """Pieces per sheet for one orientation; sheet sizes are already net of margins."""
+    across = np.floor((sheet_w + gutter) / (piece_w + gutter) + _EPSILON)
+    down = np.floor((sheet_h + gutter) / (piece_h + gutter) + _EPSILON)
+    return np.clip(across, 0, None) * np.clip(down, 0, None)
+
+
+def fit_count(piece_w, piece_h, sheet_w, sheet_h, gutter=0.0, margin=0.0, rotate=True):
+    """
+    Largest grid of ``piece_w`` x ``piece_h`` pieces on each sheet, as an int
+    array. Arguments are arrays (or scalars) of the same unit.
+    """
+    piece_w, piece_h, sheet_w, sheet_h = (
+        np.asarray(a, dtype=float) for a in (piece_w, piece_h, sheet_w, sheet_h)
+    )
+    net_w = sheet_w - 2 * margin
+    net_h = sheet_h - 2 * margin
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        count = _grid(piece_w, piece_h, net_w, net_h, gutter)
+        if rotate:
+            count = np.maximum(count, _grid(piece_h, piece_w, net_w, net_h, gutter))
+
+    valid = (piece_w > 0) & (piece_h > 0) & (sheet_w > 0) & (sheet_h > 0)
+    return np.where(valid, np.nan_to_num(count), -1).astype(np.int64)
+
+
+def compute_ups(one_up_w, one_up_h, print_w, print_h, **overrides):
+    """1-ups per print sheet. 1-up and print sheet sizes are in mm."""
+    opts = options(**overrides)
+    bleed = 2 * float(opts["BLEED_MM"])
+    return fit_count(
+        _as_array(one_up_w) + bleed, _as_array(one_up_h) + bleed,
+        _as_array(print_w), _as_array(print_h),
+        gutter=float(opts["GUTTER_MM"]), margin=float(opts["MARGIN_MM"]),
+        rotate=bool(opts["ALLOW_ROTATION"]),
+    )
+
+
+def compute_purchase_ups(print_w, print_h, purchase_w, purchase_h, **overrides):
+    """Print sheets cut from each purchase sheet (print sheet in mm, purchase sheet in PURCHASE_SHEET_UNIT_MM)."""
+    opts = options(**overrides)
+    unit = float(opts["PURCHASE_SHEET_UNIT_MM"])
+    return fit_count(
+        _as_array(print_w), _as_array(print_h),
+        _as_array(purchase_w) * unit, _as_array(purchase_h) * unit,
+        margin=float(opts["CUT_MARGIN_MM"]), rotate=True,
+    )
+
+
+def impose(one_up_w, one_up_h, print_w, print_h, purchase_w, purchase_h, **overrides):
+    """
+    Single-SKU form: returns ``(ups, purchase_ups)``, with None for a value
+    whose dimensions are missing.
+    """
+    ups = compute_ups([one_up_w], [one_up_h], [print_w], [print_h], **overrides)[0]
+    purchase_ups = compute_purchase_ups([print_w], [print_h], [purchase_w], [purchase_h], **overrides)[0]
+    return (int(ups) if ups >= 0 else None), (int(purchase_ups) if purchase_ups >= 0 else None)
+
+
+CATALOG_FIELDS = [
+    "one_up_width", "one_up_height",
+    "print_sheet_width", "print_sheet_height",
+    "purchase_sheet_width", "purchase_sheet_height",
+    "ups", "purchase_ups",
+]
+
+
+def check_catalog(queryset, **overrides):
+    """
+    Recompute ups for every SKU in ``queryset`` and return the ones whose
+    stored values differ, as a dict of NumPy arrays: id, sku_code, ups,
+    computed_ups, purchase_ups and computed_purchase_ups (-1 = not computable).
+    """
+    # Cast in SQL: building 100k Decimals costs far more than the arithmetic
+    casts = {f"_{field}": Cast(field, FloatField()) for field in CATALOG_FIELDS}
+    rows = list(queryset.order_by("pk").annotate(**casts).values_list("id", "sku_code", *casts))
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return {key: empty for key in ("id", "sku_code", "ups", "computed_ups", "purchase_ups", "computed_purchase_ups")}
+
+    ids, codes, *columns = zip(*rows)
+    one_up_w, one_up_h, print_w, print_h, purchase_w, purchase_h, ups, purchase_ups = (
+        _as_array(column) for column in columns
+    )
+    computed_ups = compute_ups(one_up_w, one_up_h, print_w, print_h, **overrides)
+    computed_purchase = compute_purchase_ups(print_w, print_h, purchase_w, purchase_h, **overrides)
+
+    wrong = ((computed_ups >= 0) & (computed_ups != ups)) | ((computed_purchase >= 0) & (computed_purchase != purchase_ups))
+    return {
+        "id": np.array(ids, dtype=np.int64)[wrong],
+        "sku_code": np.array(codes, dtype=object)[wrong],
+        "ups": ups[wrong].astype(np.int64),
+        "computed_ups": computed_ups[wrong],
+        "purchase_ups": purchase_ups[wrong].astype(np.int64),
+        "computed_purchase_ups": computed_purchase[wrong],
+    }
@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from recipes.tasks import STALE_AFTER, claim_next_task, reclaim_stale_tasks, run_import_task
+
+
+class Command(BaseCommand):
+    help = "Process queued bulk upload tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=2.0,
+            help="Seconds to wait between checks when the queue is empty.",
+        )
+        parser.add_argument(
+            "--stale-after", type=float, default=STALE_AFTER.total_seconds(),
+            help="Fail running tasks that reported no progress for this many seconds "
+                 "(their worker died) before taking new ones.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Import worker started.")
+        reclaimed = reclaim_stale_tasks(timedelta(seconds=options["stale_after"]))
+        if reclaimed:
+            self.stdout.write(f"Marked {reclaimed} abandoned task(s) as failed.")
+        while True:
+            task = claim_next_task()
+            if task is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Processing {task}")
+            try:
+                run_import_task(task)
+            except Exception as e:
+                # Recording the outcome failed too; the task is reclaimed as
+                # stale later, and the worker carries on with the queue.
+                self.stderr.write(f"Could not record the outcome of {task}: {e}")
+                continue
+            self.stdout.write(f"Finished {task}: {task.message}")
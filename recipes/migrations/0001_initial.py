@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SKURecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku_code', models.CharField(editable=False, max_length=50, unique=True)),
+                ('sku_name', models.CharField(max_length=200, unique=True)),
+                ('material_type', models.CharField(max_length=100)),
+                ('application_type', models.CharField(max_length=100)),
+                ('one_up_width', models.DecimalField(decimal_places=2, help_text='Width in mm', max_digits=6)),
+                ('one_up_height', models.DecimalField(decimal_places=2, help_text='Height in mm', max_digits=6)),
+                ('print_sheet_width', models.DecimalField(blank=True, decimal_places=2, help_text='Width in mm', max_digits=6, null=True)),
+                ('print_sheet_height', models.DecimalField(blank=True, decimal_places=2, help_text='Height in mm', max_digits=6, null=True)),
+                ('print_sheet_size', models.CharField(blank=True, help_text='Format: WxH (optional)', max_length=50, null=True)),
+                ('ups', models.PositiveIntegerField(help_text='How many 1-ups fit in print sheet')),
+                ('purchase_sheet_width', models.DecimalField(blank=True, decimal_places=2, help_text='Width in inches', max_digits=6, null=True)),
+                ('purchase_sheet_height', models.DecimalField(blank=True, decimal_places=2, help_text='Height in inches', max_digits=6, null=True)),
+                ('purchase_sheet_size', models.CharField(blank=True, help_text='Format: WxH (optional)', max_length=50, null=True)),
+                ('purchase_ups', models.PositiveIntegerField(help_text='How many ups fit in purchase sheet')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_importtask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='skurecipe',
+            index=models.Index(fields=['created_at', 'id'], name='sku_created_id_idx'),
+        ),
+    ]
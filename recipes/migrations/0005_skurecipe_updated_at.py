@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_sku_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skurecipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
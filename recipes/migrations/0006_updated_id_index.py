@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_skurecipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='skurecipe',
+            index=models.Index(fields=['updated_at', 'id'], name='sku_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_updated_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importtask',
+            name='report_format',
+            field=models.CharField(choices=[('xlsx', 'Excel (.xlsx)'), ('csv', 'CSV (smaller, opens anywhere)')], default='xlsx', max_length=4),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_importtask_report_format'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importtask',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last sign of life from the worker', null=True),
+        ),
+    ]
@@ -1,7 +1,23 @@
 from django.db import models
+from django.utils import timezone
 from decimal import Decimal, InvalidOperation
 import re
 
+from core.reports import FORMAT_CHOICES, XLSX
+from core.sequences import reserve
+
+
+SKU_CODE_SEQUENCE = "sku_code"
+
+# Dashboard counter of catalog size (see core.stats)
+SKU_TOTAL_STAT = "skus:total"
+
+
+def _last_sku_number():
+    """Highest number among existing SKU-<n> codes; seeds the sku_code sequence once."""
+    codes = SKURecipe.objects.filter(sku_code__regex=r"^SKU-[0-9]+$").values_list("sku_code", flat=True)
+    return max((int(code[4:]) for code in codes), default=0)
+
 
 class SKURecipe(models.Model):
     sku_code = models.CharField(max_length=50, unique=True, editable=False)  # auto-generated
@@ -28,19 +44,26 @@ class SKURecipe(models.Model):
     purchase_ups = models.PositiveIntegerField(help_text="How many ups fit in purchase sheet")
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination key for sku_list (see core.pagination)
+            models.Index(fields=["created_at", "id"], name="sku_created_id_idx"),
+            # Cursor of the change-ordered API listing (see core.api)
+            models.Index(fields=["updated_at", "id"], name="sku_updated_id_idx"),
+        ]
+
+    @classmethod
+    def allocate_codes(cls, count=1):
+        """Reserve ``count`` consecutive SKU codes in one atomic statement."""
+        first = reserve(SKU_CODE_SEQUENCE, count, seed=_last_sku_number)
+        return [f"SKU-{number:04d}" for number in range(first, first + count)]
 
     def save(self, *args, **kwargs):
         # Auto-generate sequential SKU code
         if not self.sku_code:
-            last_obj = SKURecipe.objects.order_by("-created_at").first()
-            if last_obj and last_obj.sku_code.startswith("SKU-"):
-                try:
-                    last_number = int(last_obj.sku_code.replace("SKU-", ""))
-                except ValueError:
-                    last_number = 0
-            else:
-                last_number = 0
-            self.sku_code = f"SKU-{last_number + 1:04d}"
+            self.sku_code = self.allocate_codes()[0]
 
         # Parse print sheet size if WxH string is provided
         if self.print_sheet_size and (not self.print_sheet_width or not self.print_sheet_height):
@@ -77,3 +100,49 @@ class SKURecipe(models.Model):
 
     def __str__(self):
         return f"{self.sku_code} - {self.sku_name}"
+
+
+class ImportTask(models.Model):
+    """A bulk upload queued for the background import worker."""
+
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    file = models.FileField(upload_to="imports/")
+    original_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued", db_index=True)
+
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_created = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    error_file = models.FileField(upload_to="imports/errors/", blank=True, null=True)
+    report_format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default=XLSX)
+    message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True, help_text="Last sign of life from the worker")
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def file_ext(self):
+        return self.original_name.split(".")[-1].lower()
+
+    @property
+    def is_finished(self):
+        return self.status in ("completed", "failed")
+
+    def rate(self):
+        """Rows processed per second since the worker picked the task up."""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"Import #{self.pk} - {self.original_name} ({self.status})"
@@ -0,0 +1,141 @@
+"""
+Per-process LRU cache of SKU recipes, keyed by sku_name.
+
+Every SKURecipe save/delete (and every bulk import) stores a fresh version
+token in Django's cache. Before serving from memory a process compares that
+token with the one its entries were loaded under and drops them all when it
+has changed, so workers never keep serving a recipe that was edited elsewhere.
+
+``aget_recipe``/``acurrent_version`` are the same lookups for async views;
+they share the in-memory entries with the sync versions, and concurrent
+misses for one SKU share a single query (core.singleflight).
+"""
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.singleflight import shared
+from .models import SKURecipe
+
+
+VERSION_KEY = "recipes:version"
+
+RECIPE_FIELDS = [
+    "id", "sku_code", "sku_name",
+    "material_type", "application_type",
+    "one_up_width", "one_up_height",
+    "print_sheet_width", "print_sheet_height", "print_sheet_size", "ups",
+    "purchase_sheet_width", "purchase_sheet_height", "purchase_sheet_size", "purchase_ups",
+    "updated_at",
+]
+
+_MISSING = object()
+_lock = threading.Lock()
+_pending = threading.local()  # .bump: a queued bump has not run yet
+_entries = OrderedDict()
+_entries_version = None
+
+
+def current_version():
+    """Return the shared version token, creating one if the cache has none."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def acurrent_version():
+    """Async current_version."""
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Invalidate every process's cached recipes."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    clear()
+
+
+def schedule_version_bump():
+    """
+    Bump the version once the current transaction commits, so no process can
+    re-cache the old rows in between. Repeated calls inside one transaction
+    (e.g. a queryset delete sending one signal per row) each queue a
+    callback, but only the first of those to run bumps.
+    """
+    _pending.bump = True
+    transaction.on_commit(_bump_if_pending)
+
+
+def _bump_if_pending():
+    # Flags are per thread, like Django's connections. One left set by a
+    # rolled-back transaction only means the next commit bumps, as it would.
+    if getattr(_pending, "bump", False):
+        _pending.bump = False
+        bump_version()
+
+
+def clear():
+    global _entries_version
+    with _lock:
+        _entries.clear()
+        _entries_version = None
+
+
+def _lookup(version, sku_name):
+    """The cached value for ``sku_name`` under ``version``, or _MISSING."""
+    global _entries_version
+    with _lock:
+        if version != _entries_version:
+            _entries.clear()
+            _entries_version = version
+        value = _entries.get(sku_name, _MISSING)
+        if value is not _MISSING:
+            _entries.move_to_end(sku_name)
+        return value
+
+
+def _store(version, sku_name, value):
+    with _lock:
+        # Only keep it if nothing changed while we were querying
+        if version == _entries_version:
+            _entries[sku_name] = value
+            _entries.move_to_end(sku_name)
+            while len(_entries) > settings.RECIPE_CACHE_SIZE:
+                _entries.popitem(last=False)
+
+
+def get_recipe(sku_name):
+    """
+    Return the recipe named ``sku_name`` as a dict of RECIPE_FIELDS, or None
+    if there is no such SKU. Misses are cached too, until the next change.
+    """
+    version = current_version()
+    value = _lookup(version, sku_name)
+    if value is _MISSING:
+        value = SKURecipe.objects.filter(sku_name=sku_name).values(*RECIPE_FIELDS).first()
+        _store(version, sku_name, value)
+    return dict(value) if value else None
+
+
+async def aget_recipe(sku_name):
+    """Async get_recipe; a miss is loaded with the async ORM."""
+    version = await acurrent_version()
+    value = _lookup(version, sku_name)
+    if value is _MISSING:
+        value = await shared(("recipe", version, sku_name), lambda: _aload(version, sku_name))
+    return dict(value) if value else None
+
+
+async def _aload(version, sku_name):
+    value = await SKURecipe.objects.filter(sku_name=sku_name).values(*RECIPE_FIELDS).afirst()
+    _store(version, sku_name, value)
+    return value
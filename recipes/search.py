@@ -0,0 +1,183 @@
+"""
+Full-text SKU search backed by an SQLite FTS5 index.
+
+``recipes_skurecipe_fts`` is an external-content FTS5 table over SKU name,
+code, material and application type. Triggers on ``recipes_skurecipe`` keep
+it in sync for every write path (save, delete, queryset updates and bulk
+imports). Queries match every token as a prefix and are ranked with bm25,
+SKU name first. Other database backends fall back to icontains filters.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from core.pagination import NEXT, PAGE_SIZE, PREVIOUS, KeysetPage, keyset_paginate, pack_cursor, unpack_cursor
+
+from .models import SKURecipe
+
+
+FTS_TABLE = "recipes_skurecipe_fts"
+CONTENT_TABLE = "recipes_skurecipe"
+FTS_COLUMNS = ["sku_name", "sku_code", "material_type", "application_type"]
+
+# bm25 column weights, same order as FTS_COLUMNS
+RANK = f"bm25({FTS_TABLE}, 10.0, 8.0, 2.0, 1.0)"
+
+_TRIGGERS = {
+    f"{FTS_TABLE}_ai": """
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {content} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+    f"{FTS_TABLE}_ad": """
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {content} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END""",
+    f"{FTS_TABLE}_au": """
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {content} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+}
+
+
+def is_available(using=connection):
+    return using.vendor == "sqlite"
+
+
+def install_search_index(using=connection):
+    """
+    Create the FTS table and its triggers if they are missing, rebuilding the
+    index when triggers had to be (re)created. SQLite drops a table's triggers
+    whenever a migration rebuilds it, so this also runs after every migrate.
+    """
+    if not is_available(using):
+        return
+    fmt = {
+        "fts": FTS_TABLE,
+        "content": CONTENT_TABLE,
+        "cols": ", ".join(FTS_COLUMNS),
+        "new_cols": ", ".join(f"new.{c}" for c in FTS_COLUMNS),
+        "old_cols": ", ".join(f"old.{c}" for c in FTS_COLUMNS),
+    }
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{', '.join(FTS_COLUMNS)}, content='{CONTENT_TABLE}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+        )
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [CONTENT_TABLE]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in _TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(_TRIGGERS[name].format(**fmt))
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search_index(using=connection):
+    if not is_available(using):
+        return
+    with using.cursor() as cursor:
+        for name in _TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def match_expression(query):
+    """
+    Turn user input into an FTS5 query: every word must match as a prefix.
+    Returns None when the input has no searchable words.
+    """
+    tokens = re.findall(r"\w+", query.lower())
+    if not tokens:
+        return None
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def filter_skus(query, queryset=None):
+    """Unranked queryset of SKUs matching ``query`` (used for exports)."""
+    queryset = SKURecipe.objects.all() if queryset is None else queryset
+    if not is_available():
+        return queryset.filter(_fallback_filter(query))
+    match = match_expression(query)
+    if match is None:
+        return queryset.none()
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    )
+
+
+def search_page(query, cursor=None, per_page=PAGE_SIZE):
+    """
+    One page of SKUs matching ``query``, best matches first. Pages are keyed
+    on (rank, rowid) so paging deeper does not re-read earlier pages.
+    """
+    if not is_available():
+        return keyset_paginate(filter_skus(query), cursor, per_page)
+
+    match = match_expression(query)
+    if match is None:
+        return KeysetPage([])
+
+    position = _decode(cursor)
+    sql = f"SELECT rowid, {RANK} AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [match]
+    if position is None:
+        sql += " ORDER BY score, rowid LIMIT %s"
+        direction = NEXT
+    else:
+        direction, score, pk = position
+        if direction == NEXT:
+            sql += " AND (score > %s OR (score = %s AND rowid > %s)) ORDER BY score, rowid LIMIT %s"
+        else:
+            sql += " AND (score < %s OR (score = %s AND rowid < %s)) ORDER BY score DESC, rowid DESC LIMIT %s"
+        params += [score, score, pk]
+    params.append(per_page + 1)
+
+    with connection.cursor() as c:
+        c.execute(sql, params)
+        rows = c.fetchall()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == PREVIOUS:
+        rows.reverse()
+
+    by_id = SKURecipe.objects.in_bulk([rowid for rowid, _ in rows])
+    items = [by_id[rowid] for rowid, _ in rows if rowid in by_id]
+    if not rows:
+        return KeysetPage(items)
+
+    first, last = rows[0], rows[-1]
+    if direction == NEXT:
+        next_cursor = _encode(NEXT, *last) if has_more else None
+        previous_cursor = _encode(PREVIOUS, *first) if position is not None else None
+    else:
+        next_cursor = _encode(NEXT, *last)
+        previous_cursor = _encode(PREVIOUS, *first) if has_more else None
+    return KeysetPage(items, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+
+def _fallback_filter(query):
+    return (
+        Q(sku_name__icontains=query) | Q(sku_code__icontains=query)
+        | Q(material_type__icontains=query) | Q(application_type__icontains=query)
+    )
+
+
+def _encode(direction, rowid, score):
+    return pack_cursor(direction, repr(score), rowid)
+
+
+def _decode(value):
+    parts = unpack_cursor(value)
+    if not parts or len(parts) != 3 or parts[0] not in (NEXT, PREVIOUS):
+        return None
+    try:
+        return parts[0], float(parts[1]), int(parts[2])
+    except ValueError:
+        return None
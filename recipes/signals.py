@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.stats import adjust
+
+from .models import SKU_TOTAL_STAT, SKURecipe
+from .recipe_cache import schedule_version_bump
+
+
+@receiver(post_save, sender=SKURecipe)
+@receiver(post_delete, sender=SKURecipe)
+def invalidate_recipe_cache(sender, **kwargs):
+    schedule_version_bump()
+
+
+@receiver(post_save, sender=SKURecipe)
+def count_created_sku(sender, instance, created, **kwargs):
+    if created:
+        adjust({SKU_TOTAL_STAT: 1})
+
+
+@receiver(post_delete, sender=SKURecipe)
+def count_deleted_sku(sender, instance, **kwargs):
+    adjust({SKU_TOTAL_STAT: -1})
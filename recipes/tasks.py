@@ -0,0 +1,130 @@
+"""
+DB-backed queue for bulk uploads.
+
+``bulk_upload`` stores the file as an ImportTask and returns straight away;
+``python manage.py run_import_worker`` claims queued tasks and imports them
+with the streaming engine, updating progress counters after every chunk.
+A task whose worker died is failed by the next worker that starts, once
+its heartbeat is older than STALE_AFTER.
+"""
+import logging
+from contextlib import closing
+from datetime import timedelta
+
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from core.reports import XLSX, ErrorReport
+
+from .importer import MissingColumnsError, import_stream, iter_chunks
+from .models import ImportTask
+
+logger = logging.getLogger(__name__)
+
+# A running task without progress for this long is taken to have lost its worker
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue_import(uploaded_file, report_format=XLSX):
+    """Save an uploaded file and queue it for the worker."""
+    return ImportTask.objects.create(
+        file=uploaded_file, original_name=uploaded_file.name, report_format=report_format
+    )
+
+
+def claim_next_task():
+    """
+    Atomically move the oldest queued task to "running" and return it.
+    The conditional UPDATE makes it safe to run several workers at once.
+    """
+    while True:
+        task = ImportTask.objects.filter(status="queued").order_by("created_at", "id").first()
+        if task is None:
+            return None
+        now = timezone.now()
+        claimed = ImportTask.objects.filter(pk=task.pk, status="queued").update(
+            status="running", started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            task.refresh_from_db()
+            return task
+
+
+def reclaim_stale_tasks(stale_after=STALE_AFTER):
+    """
+    Fail "running" tasks whose worker stopped reporting progress, so their
+    progress page stops polling. Chunks committed before the worker died
+    stay imported and keep their counts. Returns the number of tasks failed.
+    """
+    cutoff = timezone.now() - stale_after
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at=None, started_at__lt=cutoff)
+    return ImportTask.objects.filter(stale, status="running").update(
+        status="failed",
+        message="The import worker stopped before the file was finished. "
+                "The rows counted here were imported; upload the rest again.",
+        finished_at=timezone.now(),
+    )
+
+
+def run_import_task(task):
+    """
+    Import a claimed task's file and record the outcome on the task. Any
+    error fails the task instead of reaching the worker loop.
+    """
+    try:
+        status, message = _import(task)
+    except Exception as e:
+        logger.exception("Import task %s failed", task.pk)
+        status, message = "failed", f"Error processing file: {str(e)}"
+    _finish(task, status, message=message)
+    return task
+
+
+def _import(task):
+    report = ErrorReport(task.report_format)
+
+    def on_progress(totals):
+        task.rows_processed = totals["rows"]
+        task.rows_created = totals["created"]
+        task.rows_failed = totals["failed"]
+        task.heartbeat_at = timezone.now()
+        ImportTask.objects.filter(pk=task.pk).update(
+            rows_processed=task.rows_processed,
+            rows_created=task.rows_created,
+            rows_failed=task.rows_failed,
+            heartbeat_at=task.heartbeat_at,
+        )
+
+    try:
+        try:
+            # The reader is closed before the file, also when the import breaks off
+            with task.file.open("rb") as f, closing(iter_chunks(f, task.file_ext)) as chunks:
+                totals = import_stream(chunks, on_errors=report.add, on_progress=on_progress)
+        except MissingColumnsError as e:
+            status, message = "failed", str(e)
+        except Exception as e:
+            logger.exception("Import task %s failed", task.pk)
+            status, message = "failed", f"Error processing file: {str(e)}"
+            if task.rows_created:
+                message += f" {task.rows_created} SKUs were imported before the error."
+        else:
+            status, message = "completed", f"{totals['created']} SKUs imported, {totals['failed']} rows failed."
+
+        # Keep the failing rows found so far, also when the file broke off midway
+        if report.rows:
+            with report.close() as f:
+                task.error_file.save(report.filename(f"import_{task.pk}_errors"), File(f), save=False)
+    finally:
+        # Imports without failing rows never close the report themselves
+        report.file.close()
+    return status, message
+
+
+def _finish(task, status, message=""):
+    # Only the outcome is written; the row counters are kept up to date by
+    # on_progress after every committed chunk.
+    task.status = status
+    task.message = message
+    task.finished_at = timezone.now()
+    task.save(update_fields=["status", "message", "finished_at", "error_file"])
@@ -1,3 +1,317 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import io
+import shutil
+import tempfile
+from contextlib import closing
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core import metrics
+from core.reports import ErrorReport
+
+from . import recipe_cache
+from .imposition import check_catalog, impose
+from .importer import import_dataframe, import_stream, iter_chunks
+from .models import ImportTask, SKURecipe
+from .tasks import claim_next_task, enqueue_import, reclaim_stale_tasks, run_import_task
+from .search import filter_skus
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def make_sku(name, **fields):
+    values = dict(
+        sku_name=name, material_type="Art Paper", application_type="UV",
+        one_up_width=50, one_up_height=70, print_sheet_width=500, print_sheet_height=700, ups=100,
+        purchase_sheet_width=23, purchase_sheet_height=35, purchase_ups=1,
+    )
+    values.update(fields)
+    return SKURecipe.objects.create(**values)
+
+
+class ImpositionTests(TestCase):
+    def test_grid(self):
+        self.assertEqual(impose(50, 70, 500, 700, 23, 35), (100, 1))
+
+    def test_bleed_and_gutter(self):
+        self.assertEqual(impose(50, 70, 500, 700, 23, 35, BLEED_MM=3, GUTTER_MM=2), (72, 1))
+
+    def test_rotation(self):
+        self.assertEqual(impose(60, 40, 500, 700, None, None, ALLOW_ROTATION=False), (136, None))
+        self.assertEqual(impose(60, 40, 500, 700, None, None), (136, None))
+        self.assertEqual(impose(700, 500, 500, 700, None, None, ALLOW_ROTATION=False)[0], 0)
+        self.assertEqual(impose(700, 500, 500, 700, None, None)[0], 1)
+
+    def test_missing_dimensions(self):
+        self.assertEqual(impose(50, 70, None, 700, 23, 35), (None, None))
+
+    def test_check_catalog_reports_mismatches(self):
+        make_sku("Right")
+        wrong = make_sku("Wrong", ups=7)
+        result = check_catalog(SKURecipe.objects.all())
+        self.assertEqual(list(result["id"]), [wrong.pk])
+        self.assertEqual(list(result["computed_ups"]), [100])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ImporterTests(TestCase):
+    def setUp(self):
+        recipe_cache.bump_version()
+
+    def frame(self, rows):
+        columns = ["sku_name", "material_type", "application_type", "one_up_width", "one_up_height",
+                   "print_sheet_width", "print_sheet_height", "ups", "purchase_sheet_width",
+                   "purchase_sheet_height", "purchase_ups"]
+        return pd.DataFrame(rows, columns=columns)
+
+    def test_valid_rows_are_created_and_failures_reported(self):
+        make_sku("Existing")
+        df = self.frame([
+            ["New Tag", "Art", "UV", 50, 70, 500, 700, None, 23, 35, None],
+            ["Existing", "Art", "UV", 50, 70, 500, 700, 10, 23, 35, 1],
+            ["New Tag", "Art", "UV", 50, 70, 500, 700, 10, 23, 35, 1],
+            ["Bad Size", "Art", "UV", "50x70", 70, 500, 700, 10, 23, 35, 1],
+        ])
+        self.assertEqual(import_dataframe(df), 1)
+        self.assertEqual(df["Error"].tolist()[0], "")
+        self.assertEqual(df["Error"].tolist()[1], "Row 3: SKU name already exists")
+        self.assertEqual(df["Error"].tolist()[2], "Row 4: SKU name already exists")
+        self.assertIn("looks like WxH", df["Error"].tolist()[3])
+        created = SKURecipe.objects.get(sku_name="New Tag")
+        self.assertEqual((created.ups, created.purchase_ups), (100, 1))  # blanks calculated
+        self.assertTrue(created.sku_code.startswith("SKU-"))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def non_insert_queries(first, count):
+            rows = [[f"Tag {i}", "Art", "UV", 50, 70, 500, 700, 10, 23, 35, 1] for i in range(first, first + count)]
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(import_dataframe(self.frame(rows)), count)
+            # Only the batched INSERTs may grow with the file (SQLite caps parameters per statement)
+            return [q["sql"] for q in captured.captured_queries if not q["sql"].startswith("INSERT")]
+
+        non_insert_queries(0, 10)  # creates the sequence and counter rows
+        self.assertEqual(len(non_insert_queries(100, 30)), len(non_insert_queries(1000, 300)))
+
+    def test_bad_counts_fail_only_their_row(self):
+        rows = [[f"Tag {i}", "Art", "UV", 50, 70, 500, 700, ups, 23, 35, 1] for i, ups in enumerate(["inf", "3.9", "-2", "12"])]
+        upload = io.BytesIO(self.frame(rows).to_csv(index=False).encode())
+        failed = []
+        totals = import_stream(iter_chunks(upload, "csv"), on_errors=lambda columns, rows: failed.extend(rows))
+        self.assertEqual((totals["created"], totals["failed"]), (1, 3))
+        self.assertEqual([(number, error) for number, error, _ in failed], [
+            (2, "Invalid ups: 'inf' must be a whole number"),
+            (3, "Invalid ups: '3.9' must be a whole number"),
+            (4, "Invalid ups: '-2' must be a whole number"),
+        ])
+        self.assertEqual(SKURecipe.objects.get(sku_name="Tag 3").ups, 12)
+
+    def test_na_cells_are_blank_in_csv_and_xlsx(self):
+        rows = [["NA Tag", "Art", "UV", 50, 70, 500, 700, "NA", 23, 35, " null "]]
+        workbook = openpyxl.Workbook()
+        workbook.active.append(list(self.frame(rows).columns))
+        workbook.active.append(rows[0])
+        xlsx = io.BytesIO()
+        workbook.save(xlsx)
+        uploads = {
+            "csv": io.BytesIO(self.frame(rows).to_csv(index=False).encode()),
+            "xlsx": io.BytesIO(xlsx.getvalue()),
+        }
+        for file_ext, upload in uploads.items():
+            with self.subTest(file_ext):
+                SKURecipe.objects.filter(sku_name="NA Tag").delete()
+                totals = import_stream(iter_chunks(upload, file_ext))
+                self.assertEqual((totals["created"], totals["failed"]), (1, 0))
+                created = SKURecipe.objects.get(sku_name="NA Tag")
+                self.assertEqual((created.ups, created.purchase_ups), (100, 1))  # calculated, as for blanks
+
+    @override_settings(BULK_UPLOAD_IN_BACKGROUND=False)
+    def test_upload_report_has_only_the_failing_rows(self):
+        rows = [[f"Tag {i}", "Art", "UV", 50, 70, 500, 700, 10, 23, 35, 1] for i in range(50)]
+        rows[20][3] = "50x70"
+        upload = SimpleUploadedFile("skus.csv", self.frame(rows).to_csv(index=False).encode())
+        response = self.client.post(reverse("bulk-upload"), {"file": upload, "report_format": "csv"})
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="bulk_upload_errors.csv"')
+        report = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(report[0][:3], ["Row", "Error", "sku_name"])
+        self.assertEqual(report[1][:3], ["22", "Invalid one_up_width: '50x70' looks like WxH, expected a number only", "Tag 20"])
+        self.assertEqual(len(report), 2)
+        self.assertEqual(SKURecipe.objects.count(), 49)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ImportTaskTests(TestCase):
+    def setUp(self):
+        recipe_cache.bump_version()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+
+    def upload(self, rows):
+        header = "sku_name,material_type,application_type,one_up_width,one_up_height,ups,purchase_ups\n"
+        body = "".join(f"{name},Art,UV,{width},70,10,1\n" for name, width in rows)
+        return enqueue_import(SimpleUploadedFile("skus.csv", (header + body).encode()), report_format="csv")
+
+    def enqueue(self, rows):
+        self.upload(rows)
+        return claim_next_task()
+
+    def test_a_file_failing_midway_keeps_its_progress_and_report(self):
+        task = self.enqueue([("A", 50), ("B", "50x70"), ("C", 50), ("D", 50)])
+
+        def fail_after_first_chunk(f, file_ext):
+            with closing(iter_chunks(f, file_ext, chunksize=2)) as chunks:
+                yield next(chunks)
+                raise OSError("disk gone")
+
+        with mock.patch("recipes.tasks.iter_chunks", fail_after_first_chunk), self.assertLogs("recipes.tasks", "ERROR"):
+            run_import_task(task)
+        task.refresh_from_db()
+        self.assertEqual(task.status, "failed")
+        self.assertEqual((task.rows_processed, task.rows_created, task.rows_failed), (2, 1, 1))
+        self.assertIn("1 SKUs were imported before the error", task.message)
+        with task.error_file.open("rb") as f:
+            report = list(csv.reader(io.StringIO(f.read().decode())))
+        self.assertEqual(report[1][:3], ["3", "Invalid one_up_width: '50x70' looks like WxH, expected a number only", "B"])
+
+    def test_report_is_closed_when_nothing_failed(self):
+        task = self.enqueue([("A", 50)])
+        reports = []
+
+        def make_report(report_format):
+            reports.append(ErrorReport(report_format))
+            return reports[-1]
+
+        with mock.patch("recipes.tasks.ErrorReport", make_report):
+            run_import_task(task)
+        self.assertEqual(task.status, "completed")
+        self.assertTrue(reports[0].file.closed)
+
+    def test_worker_keeps_polling_after_an_unexpected_error(self):
+        first, second = self.upload([("A", "50x70")]), self.upload([("B", 50)])
+        with mock.patch("recipes.tasks.ErrorReport.filename", side_effect=OSError("storage full")), \
+                self.assertLogs("recipes.tasks", "ERROR"):
+            call_command("run_import_worker", "--once", stdout=io.StringIO())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.message), ("failed", "Error processing file: storage full"))
+        self.assertEqual(second.status, "completed")
+
+    def test_abandoned_running_tasks_are_failed(self):
+        task = self.enqueue([("A", 50)])
+        ImportTask.objects.filter(pk=task.pk).update(heartbeat_at=timezone.now() - datetime.timedelta(hours=1))
+        fresh = self.enqueue([("B", 50)])
+        self.assertEqual(reclaim_stale_tasks(), 1)
+        self.assertEqual(ImportTask.objects.get(pk=task.pk).status, "failed")
+        self.assertEqual(ImportTask.objects.get(pk=fresh.pk).status, "running")
+
+
+class RecipeCacheTests(TestCase):
+    def test_one_bump_per_committed_transaction(self):
+        for i in range(3):
+            make_sku(f"Matt Tag {i:03d}")
+        with mock.patch("recipes.recipe_cache.bump_version") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                SKURecipe.objects.all().delete()  # one post_delete signal per row
+            self.assertEqual(bump.call_count, 1)
+
+            # A rolled-back change must not keep the next commit from bumping
+            with self.captureOnCommitCallbacks() as discarded:
+                make_sku("Rolled Back")
+            discarded.clear()
+            with self.captureOnCommitCallbacks(execute=True):
+                make_sku("Committed")
+            self.assertEqual(bump.call_count, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ViewQueryBudgetTests(TestCase):
+    def setUp(self):
+        recipe_cache.bump_version()
+        for i in range(30):
+            make_sku(f"Matt Tag {i:03d}")
+
+    def test_sku_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("sku-list"))
+        self.assertEqual(len(response.context["skus"]), 30)
+
+    def test_sku_search(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("sku-list") + "?q=matt+tag+01")
+        self.assertEqual(len(response.context["skus"]), 10)
+
+    def test_autocomplete_is_served_from_memory(self):
+        self.client.get(reverse("sku-autocomplete") + "?q=ma")
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("sku-autocomplete") + "?q=matt+tag+01&limit=5")
+        self.assertEqual([r["sku_name"] for r in response.json()["results"]][:2], ["Matt Tag 010", "Matt Tag 011"])
+
+    def test_autocomplete_merges_changes_into_the_index(self):
+        url = reverse("sku-autocomplete")
+        self.client.get(url + "?q=ma")
+        make_sku("Mango Box")
+        renamed = SKURecipe.objects.get(sku_name="Matt Tag 001")
+        renamed.sku_name = "Gloss Tag 001"
+        renamed.save()
+        recipe_cache.bump_version()
+        with self.assertNumQueries(2):  # changed rows, row count
+            names = [r["sku_name"] for r in self.client.get(url + "?q=ma&limit=3").json()["results"]]
+            gloss = self.client.get(url + "?q=gloss").json()["results"]
+        self.assertEqual(names, ["Mango Box", "Matt Tag 000", "Matt Tag 002"])
+        self.assertEqual([r["sku_code"] for r in gloss], [renamed.sku_code])
+
+        SKURecipe.objects.filter(sku_name="Mango Box").delete()
+        recipe_cache.bump_version()
+        names = [r["sku_name"] for r in self.client.get(url + "?q=ma&limit=1").json()["results"]]
+        self.assertEqual(names, ["Matt Tag 000"])
+
+    async def test_async_autocomplete_builds_the_index_once(self):
+        metrics.reset()
+        url = reverse("sku-autocomplete") + "?q=matt+tag+00"
+        responses = await asyncio.gather(*(self.async_client.get(url) for _ in range(10)))
+        self.assertEqual({len(response.json()["results"]) for response in responses}, {10})
+        self.assertEqual(metrics.QUERIES.series[("sku-autocomplete",)][-2:], [1, 10])  # queries, requests
+
+    def test_export_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("sku-export"))
+            body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.strip().splitlines()), 31)
+
+
+class ApiTests(TestCase):
+    def test_cursor_pages_cover_the_catalog_once(self):
+        for i in range(25):
+            make_sku(f"Matt Tag {i:03d}", material_type="Kraft Board" if i % 5 == 0 else "Art Paper")
+        url = reverse("api-sku-list") + "?page_size=10&fields=sku_code"
+        codes = []
+        while url:
+            with self.assertNumQueries(1):
+                page = self.client.get(url).json()
+            codes += [row["sku_code"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(sorted(codes), sorted(SKURecipe.objects.values_list("sku_code", flat=True)))
+
+        response = self.client.get(reverse("api-sku-list") + "?material=kraft+board&fields=sku_name,ups")
+        self.assertEqual(len(response.json()["results"]), 5)
+        self.assertEqual(set(response.json()["results"][0]), {"sku_name", "ups"})
+
+
+class SearchTests(TestCase):
+    def test_prefix_match_on_any_column(self):
+        make_sku("Kraft Hang Tag", material_type="Kraft Board")
+        make_sku("Care Label")
+        self.assertEqual(list(filter_skus("kraf").values_list("sku_name", flat=True)), ["Kraft Hang Tag"])
+        self.assertEqual(filter_skus("label board").count(), 0)
@@ -11,7 +11,12 @@ urlpatterns = [
     path("bulk-upload/", views.bulk_upload, name="bulk-upload"),
     path("download-sample-csv/", views.download_sample_csv, name="download-sample-csv"),
     path("download-sample-excel/", views.download_sample_excel, name="download-sample-excel"),
+    path("bulk-upload/tasks/<int:pk>/", views.import_task, name="import-task"),
+    path("bulk-upload/tasks/<int:pk>/status/", views.import_task_status, name="import-task-status"),
+    path("bulk-upload/tasks/<int:pk>/errors/", views.import_task_errors, name="import-task-errors"),
 
     # Bulk Actions
     path("bulk-actions/", views.bulk_actions, name="bulk-actions"),
+    path("export/", views.sku_export, name="sku-export"),
+    path("autocomplete/", views.sku_autocomplete, name="sku-autocomplete"),
 ]
@@ -1,36 +1,42 @@
 import csv
+import hashlib
 import io
-import openpyxl
-import pandas as pd
-import re
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q
+from django.conf import settings
 from django.contrib import messages
-from django.http import HttpResponse
-from .models import SKURecipe
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from core.db import write_transaction
+from core.exports import EXPORT_CHUNK_SIZE, stream_csv
+from core.pagination import keyset_paginate
+from core.reports import ErrorReport
+from .models import ImportTask, SKURecipe
 from .forms import SKURecipeForm, BulkUploadForm
-from decimal import Decimal, InvalidOperation
+from .importer import MissingColumnsError, import_stream, iter_chunks
+from .autocomplete import asuggest
+from .recipe_cache import acurrent_version
+from .search import filter_skus, search_page
+from .tasks import enqueue_import
 from django.views.decorators.http import require_POST
 
 # ------------------------
-# Home Page
+# List View with Search
 # ------------------------
-def home(request):
-    return render(request, "home.html")
+def _search_skus(query):
+    if query:
+        return filter_skus(query)
+    return SKURecipe.objects.all()
 
 
-# ------------------------
-# List View with Search
-# ------------------------
 def sku_list(request):
     query = request.GET.get("q", "")
     if query:
-        skus = SKURecipe.objects.filter(
-            Q(sku_name__icontains=query) | Q(sku_code__icontains=query)
-        )
+        # Full-text index, best matches first
+        page = search_page(query, request.GET.get("cursor"))
     else:
-        skus = SKURecipe.objects.all()
-    return render(request, "recipes/sku_list.html", {"skus": skus, "query": query})
+        page = keyset_paginate(SKURecipe.objects.all(), request.GET.get("cursor"))
+    return render(request, "recipes/sku_list.html", {"skus": page.items, "page": page, "query": query})
 
 
 # ------------------------
@@ -41,15 +47,10 @@ def sku_create(request):
         form = SKURecipeForm(request.POST)
         if form.is_valid():
             try:
-                obj = form.save(commit=False)
-
-                # ✅ Ensure auto sku_code generation if your model uses it
-                if not obj.sku_code:
-                    from django.utils.crypto import get_random_string
-                    obj.sku_code = f"SKU-{get_random_string(6).upper()}"
-
-                obj.save()
+                obj = write_transaction(form.save)  # sku_code is allocated by SKURecipe.save
                 messages.success(request, f"SKU {obj.sku_code} created successfully!")
+                for note in form.imposition_notes:
+                    messages.warning(request, note)
                 print("✅ SKU saved successfully:", obj.sku_code)  # Debug log
                 return redirect("sku-list")
 
@@ -75,8 +76,10 @@ def sku_edit(request, pk):
         form = SKURecipeForm(request.POST, instance=sku)
         if form.is_valid():
             try:
-                form.save()
+                write_transaction(form.save)
                 messages.success(request, "SKU Recipe updated successfully!")
+                for note in form.imposition_notes:
+                    messages.warning(request, note)
                 return redirect("sku-list")
             except Exception as e:
                 messages.error(request, f"Error: {str(e)}")
@@ -93,66 +96,12 @@ def sku_edit(request, pk):
 def sku_delete(request, pk):
     sku = get_object_or_404(SKURecipe, pk=pk)
     if request.method == "POST":
-        sku.delete()
+        write_transaction(sku.delete)
         messages.success(request, "SKU Recipe deleted successfully!")
         return redirect("sku-list")
     return render(request, "recipes/sku_confirm_delete.html", {"sku": sku})
 
 
-# ------------------------
-# Helpers
-# ------------------------
-def _parse_decimal(value, field_name="value"):
-    """Try to parse a value into Decimal. Reject WxH strings."""
-    if pd.isna(value) or str(value).strip() == "":
-        return None
-
-    val = str(value).strip()
-
-    # Prevent WxH strings being passed here
-    if any(x in val.lower() for x in ["x", "×", "*"]):
-        raise ValueError(f"Invalid {field_name}: '{value}' looks like WxH, expected a number only")
-
-    try:
-        return Decimal(val.replace(",", "."))
-    except (InvalidOperation, ValueError):
-        raise ValueError(f"Invalid {field_name}: '{value}' must be a decimal number")
-
-
-def _parse_sheet_fields(width, height, size, field_name="sheet"):
-    """
-    Decide whether to store as width/height or size string.
-    Allows formats like '12.5x11' or '12.5*11' in either width/height or size column.
-    """
-    # Case 1: If size string is provided
-    if pd.notna(size) and str(size).strip() != "":
-        val = str(size).replace("×", "x").replace("*", "x").strip()
-        if "x" in val.lower():
-            parts = re.split(r"[x]", val)
-            if len(parts) == 2:
-                return _parse_decimal(parts[0], f"{field_name}_width"), _parse_decimal(parts[1], f"{field_name}_height"), None
-            return None, None, val  # fallback: keep as string
-        else:
-            return _parse_decimal(val, f"{field_name}_size"), None, None
-
-    # Case 2: Width/Height provided separately
-    if pd.notna(width) and isinstance(width, str) and any(x in width for x in ["x", "×", "*"]):
-        parts = re.split(r"[x*×]", width)
-        if len(parts) == 2:
-            return _parse_decimal(parts[0], f"{field_name}_width"), _parse_decimal(parts[1], f"{field_name}_height"), None
-
-    if pd.notna(height) and isinstance(height, str) and any(x in height for x in ["x", "×", "*"]):
-        parts = re.split(r"[x*×]", height)
-        if len(parts) == 2:
-            return _parse_decimal(parts[0], f"{field_name}_width"), _parse_decimal(parts[1], f"{field_name}_height"), None
-
-    # Normal case
-    w = _parse_decimal(width, f"{field_name}_width") if pd.notna(width) else None
-    h = _parse_decimal(height, f"{field_name}_height") if pd.notna(height) else None
-    return w, h, None
-
-
-
 # ------------------------
 # Bulk Upload SKUs
 # ------------------------
@@ -164,140 +113,79 @@ def bulk_upload(request):
             file_ext = file.name.split(".")[-1].lower()
 
             try:
-                # Read CSV or Excel into DataFrame
-                if file_ext == "csv":
-                    df = pd.read_csv(file)
-                elif file_ext in ["xls", "xlsx"]:
-                    df = pd.read_excel(file)
-                else:
+                if file_ext not in ["csv", "xls", "xlsx"]:
                     messages.error(request, "Unsupported file format. Upload CSV or Excel only.")
                     return redirect("bulk-upload")
 
-                # Required minimal columns
-                required_cols = [
-                    "sku_name", "material_type", "application_type",
-                    "one_up_width", "one_up_height",
-                    "ups", "purchase_ups"
-                ]
-                missing_cols = [col for col in required_cols if col not in df.columns]
-                if missing_cols:
-                    messages.error(request, f"Missing required columns: {', '.join(missing_cols)}")
-                    return redirect("bulk-upload")
+                report_format = form.cleaned_data["report_format"]
 
-                # Add Error column
-                df["Error"] = ""
-
-                # Get last used SKU number
-                last_sku = SKURecipe.objects.order_by("-id").first()
-                last_number = 0
-                if last_sku:
-                    try:
-                        last_number = int(last_sku.sku_code.replace("SKU-", ""))
-                    except Exception:
-                        last_number = 0
-
-                # Process each row
-                for idx, row in df.iterrows():
-                    try:
-                        row_errors = []
-
-                        # Check duplicate SKU Name
-                        if SKURecipe.objects.filter(sku_name=row["sku_name"]).exists():
-                            row_errors.append("SKU name already exists")
-                            df.at[idx, "Error"] = f"Row {idx+2}: {', '.join(row_errors)}"
-                            continue
-
-                        # Generate next SKU code
-                        last_number += 1
-                        sku_code = f"SKU-{last_number:04d}"
-
-                        # Parse fields safely
-                        try:
-                            one_up_width = _parse_decimal(row["one_up_width"], "one_up_width")
-                        except ValueError as e:
-                            row_errors.append(str(e))
-                            one_up_width = None
-
-                        try:
-                            one_up_height = _parse_decimal(row["one_up_height"], "one_up_height")
-                        except ValueError as e:
-                            row_errors.append(str(e))
-                            one_up_height = None
-
-                        # Handle Print Sheet
-                        try:
-                            print_w, print_h, print_size = _parse_sheet_fields(
-                                row.get("print_sheet_width"),
-                                row.get("print_sheet_height"),
-                                row.get("print_sheet_size"),
-                                field_name="print_sheet"
-                            )
-                        except ValueError as e:
-                            row_errors.append(str(e))
-                            print_w, print_h, print_size = None, None, None
-
-                        # Handle Purchase Sheet
-                        try:
-                            purchase_w, purchase_h, purchase_size = _parse_sheet_fields(
-                                row.get("purchase_sheet_width"),
-                                row.get("purchase_sheet_height"),
-                                row.get("purchase_sheet_size"),
-                                field_name="purchase_sheet"
-                            )
-                        except ValueError as e:
-                            row_errors.append(str(e))
-                            purchase_w, purchase_h, purchase_size = None, None, None
-
-                        # If any errors → mark row and skip creation
-                        if row_errors:
-                            df.at[idx, "Error"] = f"Row {idx+2}: {', '.join(row_errors)}"
-                            continue
-
-                        # Create SKU
-                        SKURecipe.objects.create(
-                            sku_code=sku_code,
-                            sku_name=row["sku_name"],
-                            material_type=row["material_type"],
-                            application_type=row["application_type"],
-                            one_up_width=one_up_width,
-                            one_up_height=one_up_height,
-                            ups=int(row["ups"]) if pd.notna(row["ups"]) else 0,
-
-                            # Print sheet
-                            print_sheet_width=print_w,
-                            print_sheet_height=print_h,
-                            print_sheet_size=print_size,
-
-                            # Purchase sheet
-                            purchase_sheet_width=purchase_w,
-                            purchase_sheet_height=purchase_h,
-                            purchase_sheet_size=purchase_size,
-
-                            purchase_ups=int(row["purchase_ups"]) if pd.notna(row["purchase_ups"]) else 0,
-                        )
-
-                    except Exception as e:
-                        df.at[idx, "Error"] = f"Row {idx+2}: Unexpected error → {str(e)}"
-
-                # If any errors → return error Excel
-                if (df["Error"].str.strip() != "").any():
-                    response = HttpResponse(
-                        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-                    response["Content-Disposition"] = 'attachment; filename="bulk_upload_results.xlsx"'
-                    df.to_excel(response, index=False)
-                    return response
-
-                messages.success(request, "Bulk upload completed successfully!")
-                return redirect("bulk-upload")
+                # Hand the file to the background worker and return at once
+                if settings.BULK_UPLOAD_IN_BACKGROUND:
+                    task = enqueue_import(file, report_format=report_format)
+                    return redirect("import-task", pk=task.pk)
 
+                # Imported chunk by chunk; only the failing rows are written
+                # to the report as they turn up.
+                return _bulk_upload_stream(request, file, file_ext, report_format)
+
+            except MissingColumnsError as e:
+                messages.error(request, str(e))
+                return redirect("bulk-upload")
             except Exception as e:
                 messages.error(request, f"Error processing file: {str(e)}")
                 return redirect("bulk-upload")
     else:
         form = BulkUploadForm()
 
-    return render(request, "recipes/bulk_upload.html", {"form": form})
+    recent_tasks = ImportTask.objects.order_by("-created_at")[:5]
+    return render(request, "recipes/bulk_upload.html", {"form": form, "recent_tasks": recent_tasks})
+
+
+def _bulk_upload_stream(request, file, file_ext, report_format):
+    report = ErrorReport(report_format)
+    totals = import_stream(iter_chunks(file, file_ext), on_errors=report.add)
+
+    if totals["failed"]:
+        return report.response("bulk_upload_errors")
+
+    messages.success(request, f"Bulk upload completed successfully! {totals['created']} SKUs imported.")
+    return redirect("bulk-upload")
+
+
+# ------------------------
+# Background Import Tasks
+# ------------------------
+def import_task(request, pk):
+    task = get_object_or_404(ImportTask, pk=pk)
+    return render(request, "recipes/import_task.html", {"task": task})
+
+
+def import_task_status(request, pk):
+    task = get_object_or_404(ImportTask, pk=pk)
+    data = {
+        "id": task.pk,
+        "file": task.original_name,
+        "status": task.status,
+        "rows_processed": task.rows_processed,
+        "rows_created": task.rows_created,
+        "rows_failed": task.rows_failed,
+        "rate": task.rate(),
+        "message": task.message,
+        "error_file_url": reverse("import-task-errors", args=[task.pk]) if task.error_file else None,
+    }
+    return JsonResponse(data)
+
+
+def import_task_errors(request, pk):
+    task = get_object_or_404(ImportTask, pk=pk)
+    if not task.error_file:
+        raise Http404("This import has no error file.")
+    extension = task.error_file.name.rsplit(".", 1)[-1]
+    return FileResponse(
+        task.error_file.open("rb"),
+        as_attachment=True,
+        filename=f"bulk_upload_errors_{task.pk}.{extension}",
+    )
 
 # ------------------------
 # Download Sample CSV
@@ -326,6 +214,8 @@ def download_sample_csv(request):
 # Download Sample Excel
 # ------------------------
 def download_sample_excel(request):
+    import openpyxl  # only this view needs it; keeps worker startup light
+
     workbook = openpyxl.Workbook()
     sheet = workbook.active
     sheet.title = "Recipes"
@@ -368,31 +258,79 @@ def bulk_actions(request):
         queryset = SKURecipe.objects.filter(pk__in=selected_ids)
 
         if action == "delete":
-            queryset.delete()
+            write_transaction(queryset.delete)
             return redirect("sku-list")
 
         elif action == "download":
-            # Export to CSV
-            response = HttpResponse(content_type="text/csv")
-            response["Content-Disposition"] = 'attachment; filename="selected_skus.csv"'
-
-            writer = csv.writer(response)
-            writer.writerow([
-                "SKU Code", "SKU Name", "Material", "Application",
-                "1-Up Width", "1-Up Height",
-                "Print Sheet Width", "Print Sheet Height", "UPS",
-                "Purchase Sheet Width", "Purchase Sheet Height", "Purchase UPS",
-                "Created At"
-            ])
-
-            for sku in queryset:
-                writer.writerow([
-                    sku.sku_code, sku.sku_name, sku.material_type, sku.application_type,
-                    sku.one_up_width, sku.one_up_height,
-                    sku.print_sheet_width, sku.print_sheet_height, sku.ups,
-                    sku.purchase_sheet_width, sku.purchase_sheet_height, sku.purchase_ups,
-                    sku.created_at.strftime("%Y-%m-%d %H:%M"),
-                ])
-            return response
-
-    return redirect("sku-list")
\ No newline at end of file
+            return _stream_sku_csv(queryset, "selected_skus.csv")
+
+    return redirect("sku-list")
+
+
+# ------------------------
+# CSV Export
+# ------------------------
+EXPORT_COLUMNS = [
+    ("SKU Code", "sku_code"),
+    ("SKU Name", "sku_name"),
+    ("Material", "material_type"),
+    ("Application", "application_type"),
+    ("1-Up Width", "one_up_width"),
+    ("1-Up Height", "one_up_height"),
+    ("Print Sheet Width", "print_sheet_width"),
+    ("Print Sheet Height", "print_sheet_height"),
+    ("UPS", "ups"),
+    ("Purchase Sheet Width", "purchase_sheet_width"),
+    ("Purchase Sheet Height", "purchase_sheet_height"),
+    ("Purchase UPS", "purchase_ups"),
+    ("Created At", "created_at"),
+]
+
+
+def _stream_sku_csv(queryset, filename):
+    """
+    Stream ``queryset`` as CSV. Only the exported columns are selected and
+    rows are fetched in chunks, so memory does not grow with the catalog.
+    """
+    headers = [header for header, _ in EXPORT_COLUMNS]
+    fields = [field for _, field in EXPORT_COLUMNS]
+    rows = queryset.order_by("pk").values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_csv(
+        headers,
+        ([*values, created_at.strftime("%Y-%m-%d %H:%M")] for *values, created_at in rows),
+        filename,
+    )
+
+
+def sku_export(request):
+    """Export the whole catalog, or the current sku_list search results when ?q= is given."""
+    query = request.GET.get("q", "")
+    filename = "sku_search_results.csv" if query else "all_skus.csv"
+    return _stream_sku_csv(_search_skus(query), filename)
+
+
+# ------------------------
+# SKU Autocomplete
+# ------------------------
+# How long browsers may reuse a suggestion list without asking again
+AUTOCOMPLETE_MAX_AGE = 60
+
+
+async def sku_autocomplete(request):
+    """Top-N SKUs whose name or code starts with ?q=, served from the in-memory prefix index."""
+    query = request.GET.get("q", "")
+    try:
+        limit = int(request.GET.get("limit", 10))
+    except ValueError:
+        limit = 10
+
+    # The recipe cache version changes on every catalog write, so it doubles as an ETag
+    version = await acurrent_version()
+    key = hashlib.md5(f"{limit}:{query.strip().lower()}".encode()).hexdigest()
+    etag = f'"{version}-{key}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse({"results": await asuggest(query, limit, version=version)})
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=AUTOCOMPLETE_MAX_AGE)
+    return response